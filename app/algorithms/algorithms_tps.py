@@ -19,6 +19,8 @@ from datetime import datetime, timedelta, date
 from typing import List, Dict, Optional, Tuple
 import statistics
 
+import numpy as np
+
 
 # =============================================================================
 # UTILITY FUNCTIONS
@@ -80,6 +82,37 @@ def weighted_average(values: List[float], weights: List[int], center_idx: int) -
     return weighted_sum / weight_sum if weight_sum > 0 else 0
 
 
+def weighted_average_series(values: List[float], weights: List[int], length: int = None) -> List[float]:
+    """
+    weighted_average() for every center index 0..length-1 in one NumPy pass.
+    
+    Terms are accumulated in the same weight order as the scalar version, so
+    results are bit-for-bit identical; centers with no positive value give 0.
+    """
+    n = len(values)
+    if length is None:
+        length = n
+    if n == 0:
+        return [0] * length
+    
+    vals = np.array([np.nan if v is None else v for v in values], dtype=float)
+    centers = np.arange(length)
+    half_len = len(weights) // 2
+    
+    weighted_sum = np.zeros(length)
+    weight_sum = np.zeros(length)
+    for i, w in enumerate(weights):
+        idx = centers - half_len + i
+        inside = (idx >= 0) & (idx < n)
+        window = np.where(inside, vals[np.clip(idx, 0, n - 1)], np.nan)
+        valid = window > 0  # NaN (missing/out of range) compares False, like the SIGN logic
+        weighted_sum += np.where(valid, window * w, 0.0)
+        weight_sum += np.where(valid, w, 0)
+    
+    averages = (weighted_sum / np.where(weight_sum > 0, weight_sum, 1)).tolist()
+    return [avg if ws > 0 else 0 for avg, ws in zip(averages, weight_sum.tolist())]
+
+
 # =============================================================================
 # EXCEL SETTINGS (from Settings sheet)
 # =============================================================================
@@ -144,47 +177,34 @@ def calculate_units_final_curve(units_data: List[Dict], extend_weeks: int = 10)
     
     n = len(units)  # Extended length
     
+    # Blank C (None/"") is NaN so the window MAX skips it; extended weeks are blank too
+    c = np.array([np.nan if v is None or (isinstance(v, str) and v == "") else v for v in units], dtype=float)
+    is_blank = np.isnan(c)
+    
     # Column D: Peak envelope - IF(C="","",MAX(OFFSET(C,-2,0,4)))
     # CRITICAL: D is blank only when C is EMPTY (None/""), NOT when C=0!
     # Excel treats 0 and "" differently - 0 is a valid value, "" is blank
-    peak_env = []
-    for i in range(n):
-        # Check if C is truly blank (None or empty string), NOT zero
-        # For extended future weeks (beyond original data), C is blank
-        c_val = units[i]
-        is_blank = c_val is None or (isinstance(c_val, str) and c_val == "")
-        
-        # For extended weeks (index >= n_original), treat as blank
-        if i >= n_original:
-            peak_env.append(0)
-        elif is_blank:
-            peak_env.append(0)
-        else:
-            # OFFSET(C,-2,0,4) means 4 rows: [i-2, i-1, i, i+1]
-            indices = [i-2, i-1, i, i+1]
-            values = [units[j] for j in indices if 0 <= j < n and units[j] is not None]
-            peak_env.append(max(values) if values else 0)
+    # OFFSET(C,-2,0,4) means 4 rows: [i-2, i-1, i, i+1]
+    padded = np.concatenate(([np.nan, np.nan], c, [np.nan]))
+    window_max = np.fmax.reduce([padded[k:k + n] for k in range(4)])  # fmax ignores blanks
+    peak_env = np.where(is_blank, 0.0, window_max)
     
     # Column E: Peak envelope offset = (D[i] + D[i+1]) / 2
-    peak_env_offset = []
-    for i in range(n):
-        d_current = peak_env[i]
-        d_next = peak_env[i + 1] if i + 1 < n else 0
-        peak_env_offset.append((d_current + d_next) / 2)
+    peak_env_offset = (peak_env + np.append(peak_env[1:], 0.0)) / 2
     
     # Column F: Smooth envelope = AVERAGE(OFFSET(E,-1,0,3)) = avg of E[i-1], E[i], E[i+1]
-    smooth_env = []
-    for i in range(n):
-        indices = [i-1, i, i+1]
-        values = [peak_env_offset[j] for j in indices if 0 <= j < n]
-        smooth_env.append(sum(values) / len(values) if values else 0)
+    # (rows at the edges average the 2 neighbours that exist; same left-to-right sums)
+    smooth_env = np.empty(n)
+    if n == 1:
+        smooth_env[0] = peak_env_offset[0]
+    else:
+        smooth_env[0] = (peak_env_offset[0] + peak_env_offset[1]) / 2
+        smooth_env[-1] = (peak_env_offset[-2] + peak_env_offset[-1]) / 2
+        smooth_env[1:-1] = (peak_env_offset[:-2] + peak_env_offset[1:-1] + peak_env_offset[2:]) / 3
     
     # Column G: Final curve = MAX(C, E, F)
     # Handle None values (blank C for future weeks)
-    final_curve = []
-    for i in range(n):
-        c_val = units[i] if units[i] is not None else 0
-        final_curve.append(max(c_val, peak_env_offset[i], smooth_env[i]))
+    final_curve = np.maximum(np.maximum(np.where(is_blank, 0.0, c), peak_env_offset), smooth_env).tolist()
     
     # Return the extended G values (includes future weeks for H calculation)
     return final_curve
@@ -215,12 +235,8 @@ def calculate_units_final_smooth(units_final_curve: List[float], original_length
     if original_length is None:
         original_length = len(units_final_curve)
     
-    result = []
     # Calculate H for original data rows (using extended G for proper windowing)
-    for i in range(original_length):
-        result.append(weighted_average(units_final_curve, weights, i))
-    
-    return result
+    return weighted_average_series(units_final_curve, weights, original_length)
 
 
 # =============================================================================
@@ -322,12 +338,8 @@ def calculate_prior_year_final_smooth(prior_year_peak_env: List[float], original
     if original_length is None:
         original_length = len(prior_year_peak_env)
     
-    result = []
     # Calculate L for original data rows (using extended K for proper windowing)
-    for i in range(original_length):
-        result.append(weighted_average(prior_year_peak_env, weights, i))
-    
-    return result
+    return weighted_average_series(prior_year_peak_env, weights, original_length)
 
 
 # =============================================================================
@@ -366,59 +378,43 @@ def calculate_column_n_velocity(
     while len(L) < n:
         L.append(0)
     
-    N_values = []
-    
-    for idx in range(n):
-        week_end = week_dates[idx] if idx < len(week_dates) else None
-        
-        # Only calculate for historical rows (A < TODAY)
-        if week_end is None or week_end >= today:
-            N_values.append(None)
-            continue
-        
-        # Need at least 6 weeks of data for full calculation
-        # But we'll calculate what we can with available data
-        
-        def safe_get(values, i):
-            """Safely get value at index, return 0 if invalid"""
-            if 0 <= i < len(values) and values[i] is not None and values[i] > 0:
-                return values[i]
-            return 0
-        
-        def safe_sum_range(values, start, end):
-            """Sum values from start to end (inclusive)"""
-            total = 0
-            for i in range(max(0, start), min(len(values), end + 1)):
-                val = safe_get(values, i)
-                total += val
-            return total
-        
-        # Current year (Column I) - weighted daily averages
-        i_1w = safe_get(I, idx) / 7  # 1 week
-        i_2w = safe_sum_range(I, idx-1, idx) / 14  # 2 weeks
-        i_4w = safe_sum_range(I, idx-3, idx) / 28  # 4 weeks
-        i_6w = safe_sum_range(I, idx-5, idx) / 42  # 6 weeks
-        
-        current_avg = 0.25 * i_1w + 0.25 * i_2w + 0.25 * i_4w + 0.25 * i_6w
-        
-        # Prior year (Column L) - weighted daily averages
-        l_1w = safe_get(L, idx) / 7
-        l_2w = safe_sum_range(L, idx-1, idx) / 14
-        l_4w = safe_sum_range(L, idx-3, idx) / 28
-        l_6w = safe_sum_range(L, idx-5, idx) / 42
-        
-        prior_avg = 0.25 * l_1w + 0.25 * l_2w + 0.25 * l_4w + 0.25 * l_6w
-        
-        # Velocity = (current / prior) - 1
-        # IFERROR returns 0 if calculation fails
-        if prior_avg > 0:
-            velocity = (current_avg / prior_avg) - 1
-        else:
-            velocity = 0.0
-        
-        N_values.append(velocity)
+    if n == 0:
+        return []
     
-    return N_values
+    def positive(values):
+        """Values as a float array, with missing/non-positive entries as 0 (safe_get)."""
+        arr = np.array([np.nan if v is None else v for v in values[:n]], dtype=float)
+        return np.where(arr > 0, arr, 0.0)
+    
+    def trailing_sum(arr, weeks):
+        """SUM(arr[i-weeks+1:i]) for every row, added left to right like the scalar loop."""
+        total = np.zeros(n)
+        for back in range(weeks - 1, -1, -1):
+            if back < n:
+                total[back:] += arr[:n - back]  # rows before the window start add nothing
+        return total
+    
+    def weighted_daily_average(values):
+        """0.25 each of the 1, 2, 4 and 6 week daily averages."""
+        arr = positive(values)
+        return (0.25 * (arr / 7) + 0.25 * (trailing_sum(arr, 2) / 14)
+                + 0.25 * (trailing_sum(arr, 4) / 28) + 0.25 * (trailing_sum(arr, 6) / 42))
+    
+    # Current year (Column I) vs prior year (Column L), all rows at once
+    current_avg = weighted_daily_average(I)
+    prior_avg = weighted_daily_average(L)
+    
+    # Velocity = (current / prior) - 1
+    # IFERROR returns 0 if calculation fails
+    has_prior = prior_avg > 0
+    velocity = np.where(has_prior, current_avg / np.where(has_prior, prior_avg, 1) - 1, 0.0).tolist()
+    
+    # Only calculate for historical rows (A < TODAY)
+    return [
+        velocity[idx] if idx < len(week_dates) and week_dates[idx] is not None and week_dates[idx] < today
+        else None
+        for idx in range(n)
+    ]
 
 
 def calculate_sales_velocity_adjustment(
@@ -503,12 +499,13 @@ def calculate_final_forecast(adj_forecast: List[float], week_dates: List[date],
     Averages current and next week's forecast for smoothing.
     """
     n = len(adj_forecast)
+    horizon_end = today + timedelta(days=365)
     result = []
     
     for i in range(n):
         week_end = week_dates[i] if i < len(week_dates) else None
         
-        if week_end and today <= week_end <= today + timedelta(days=365):
+        if week_end and today <= week_end <= horizon_end:
             current = adj_forecast[i]
             next_val = adj_forecast[i + 1] if i + 1 < n else current
             result.append((current + next_val) / 2)
@@ -543,6 +540,7 @@ def calculate_weekly_units_needed(
     the lead time window [TODAY, TODAY + lead_time].
     """
     lead_time_end = today + timedelta(days=lead_time_days)
+    one_week = timedelta(days=7)
     result = []
     
     for forecast, week_end in zip(forecasts, week_dates):
@@ -550,7 +548,7 @@ def calculate_weekly_units_needed(
             result.append(0)
             continue
         
-        week_start = week_end - timedelta(days=7)
+        week_start = week_end - one_week
         
         # Calculate overlap: MAX(0, MIN(lead_time_end, week_end) - MAX(today, week_start))
         period_start = max(today, week_start)
@@ -613,6 +611,7 @@ def calculate_doi(
     
     cumulative = 0
     runout_date = None
+    one_week = timedelta(days=7)
     
     for i, (forecast, week_end) in enumerate(zip(forecasts, week_dates)):
         if not week_end or week_end < today:
@@ -621,7 +620,7 @@ def calculate_doi(
         if forecast <= 0:
             continue
         
-        week_start = week_end - timedelta(days=7)
+        week_start = week_end - one_week
         inventory_at_start = inventory - cumulative
         cumulative += forecast
         inventory_remaining = inventory - cumulative
@@ -707,31 +706,26 @@ def calculate_forecast_18m_plus(
     
     # Create lookup of I values by date for prior year mapping
     i_value_lookup = {}
-    for i, d in enumerate(units_data):
-        week_end = parse_date(d.get('week_end') or d.get('week_date'))
+    for week_end, i_val in zip(week_dates, final_smooth_85):
         if week_end:
-            i_value_lookup[week_end] = final_smooth_85[i]
+            i_value_lookup[week_end] = i_val
     
     # Generate extended week dates (data + 52 future weeks)
     last_date = week_dates[-1] if week_dates else today
     extended_dates = list(week_dates)
+    known_dates = set(extended_dates)  # O(1) duplicate check instead of scanning the list
     
     # Add 104 weeks of future dates for full coverage
     for i in range(1, 105):
         future_date = last_date + timedelta(days=7 * i)
-        if future_date not in extended_dates:
+        if future_date not in known_dates:
             extended_dates.append(future_date)
+            known_dates.add(future_date)
     
     # Column J: Prior year I values (52 weeks = 364 days offset)
     # Excel: J60 = I8 means 52-row offset
-    extended_j = []
-    for week_end in extended_dates:
-        if week_end:
-            prior_week = week_end - timedelta(days=364)  # 52 weeks = 364 days
-            j_val = i_value_lookup.get(prior_week, 0)
-            extended_j.append(j_val)
-        else:
-            extended_j.append(0)
+    one_year = timedelta(days=364)  # 52 weeks = 364 days
+    extended_j = [i_value_lookup.get(week_end - one_year, 0) if week_end else 0 for week_end in extended_dates]
     
     # Column K: Rolling 2-week MAX of J values
     # Excel: K3 = MAX(OFFSET(J3, -2, 0, 2)) = MAX(J1, J2)
@@ -749,9 +743,7 @@ def calculate_forecast_18m_plus(
     # Calculate L (weighted average of K) for all dates
     # Weights: [1, 3, 5, 7, 5, 3, 1]
     weights_L = [1, 3, 5, 7, 5, 3, 1]
-    extended_L = []
-    for i in range(len(extended_k)):
-        extended_L.append(weighted_average(extended_k, weights_L, i))
+    extended_L = weighted_average_series(extended_k, weights_L)
     
     # Calculate dynamic velocity adjustment
     # Use dynamic calculation unless explicit velocity is provided AND auto_velocity is False
@@ -777,18 +769,17 @@ def calculate_forecast_18m_plus(
     velocity_weight = settings.get('velocity_weight', 0.15)
     adjustment = 1 + market_adj + (velocity_adj * velocity_weight)
     
-    extended_O = []
-    for i, week_end in enumerate(extended_dates):
-        if week_end and week_end >= today:
-            extended_O.append(extended_L[i] * adjustment)
-        else:
-            extended_O.append(0)
+    extended_O = [
+        extended_L[i] * adjustment if week_end and week_end >= today else 0
+        for i, week_end in enumerate(extended_dates)
+    ]
     
     # Calculate P (average of O and next O) for future dates
+    horizon_end = today + timedelta(days=365)
     extended_P = []
     for i in range(len(extended_O)):
         week_end = extended_dates[i] if i < len(extended_dates) else None
-        if week_end and today <= week_end <= today + timedelta(days=365):
+        if week_end and today <= week_end <= horizon_end:
             current_O = extended_O[i]
             next_O = extended_O[i + 1] if i + 1 < len(extended_O) else current_O
             extended_P.append((current_O + next_O) / 2)
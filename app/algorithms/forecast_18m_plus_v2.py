@@ -72,6 +72,10 @@ class Forecast18MonthPlusV2:
         # Step 1: Prepare base dataframe
         df = self._prepare_dataframe(sales_history)
         
+        # Rows on/after TODAY - computed once and shared by every step below
+        future_mask = df['week_end'].to_numpy() >= self.today.to_datetime64()
+        historical_mask = ~future_mask
+        
         # Step 2: Calculate smoothing (Column I)
         df = self._calc_units_final_smooth_85(df)
         
@@ -79,24 +83,24 @@ class Forecast18MonthPlusV2:
         df = self._calc_prior_year_columns(df)
         
         # Step 4: Sales velocity adjustment (Column N) - EXACT Excel formula
-        df, sales_velocity_adj = self._calc_sales_velocity_adjustment_exact(df)
+        df, sales_velocity_adj = self._calc_sales_velocity_adjustment_exact(df, historical_mask)
         
         # Step 5: Forecast columns (O, P)
-        df = self._calc_forecast_columns(df, sales_velocity_adj)
+        df = self._calc_forecast_columns(df, sales_velocity_adj, future_mask)
         
         # Step 6: Total inventory tracking (Q, R, S, T, U, V)
         df, doi_total = self._calc_inventory_tracking_exact(
-            df, inventory.total_inventory, 'total'
+            df, inventory.total_inventory, 'total', future_mask
         )
         
         # Step 7: FBA inventory tracking (W, X, Y, Z, AA, AB)
         df, doi_fba = self._calc_inventory_tracking_exact(
-            df, inventory.fba_available, 'fba'
+            df, inventory.fba_available, 'fba', future_mask
         )
         
         # Step 8: Production numbers (AC, AD, AE)
         df, unit_needed_total, units_to_make = self._calc_production_numbers(
-            df, inventory.total_inventory
+            df, inventory.total_inventory, future_mask
         )
         
         return ForecastResult(
@@ -198,29 +202,22 @@ class Forecast18MonthPlusV2:
         11-week weighted average of Column G with weights: 1,2,4,7,11,13,11,7,4,2,1
         Only calculated for rows where A <= TODAY
         """
-        result = pd.Series(index=df.index, dtype=float)
-        G = df['units_final_curve']
-        
-        for i in range(len(df)):
-            # Only calculate for historical dates (A <= TODAY)
-            if df.loc[df.index[i], 'week_end'] > self.today:
-                continue
-            
-            values = []
-            weights = []
-            
-            for offset, weight in zip(self.SMOOTH_OFFSETS_H, self.SMOOTH_WEIGHTS_H):
-                idx = i + offset
-                if 0 <= idx < len(df):
-                    val = G.iloc[idx]
-                    if not pd.isna(val) and val > 0:
-                        values.append(val)
-                        weights.append(weight)
-            
-            if weights:
-                result.iloc[i] = sum(v * w for v, w in zip(values, weights)) / sum(weights)
-        
-        return result
+        G = df['units_final_curve'].to_numpy(dtype=float)
+        kernel = np.asarray(self.SMOOTH_WEIGHTS_H, dtype=float)
+        half = len(kernel) // 2
+        
+        # Only positive, non-NaN neighbours contribute (and add their weight)
+        valid = ~np.isnan(G) & (G > 0)
+        G0 = np.where(valid, G, 0.0)
+        
+        # 'full' then slice, so short histories (< 11 rows) stay centred too
+        num = np.convolve(G0, kernel, mode='full')[half:half + len(G)]
+        den = np.convolve(valid.astype(float), kernel, mode='full')[half:half + len(G)]
+        out = np.where(den > 0, num / np.maximum(den, 1e-12), np.nan)
+        
+        # Only calculate for historical dates (A <= TODAY)
+        future = df['week_end'].to_numpy() > self.today.to_datetime64()
+        return pd.Series(np.where(future, np.nan, out), index=df.index)
     
     def _calc_prior_year_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -268,7 +265,11 @@ class Forecast18MonthPlusV2:
         
         return df
     
-    def _calc_sales_velocity_adjustment_exact(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    def _calc_sales_velocity_adjustment_exact(
+        self,
+        df: pd.DataFrame,
+        historical_mask: np.ndarray
+    ) -> Tuple[pd.DataFrame, float]:
         """
         Calculate Column N: sales_velocity_adj_weighted - EXACT Excel formula
         
@@ -288,8 +289,6 @@ class Forecast18MonthPlusV2:
         df['sales_velocity_adj'] = np.nan
         
         # Only calculate for historical rows (before today)
-        historical_mask = df['week_end'] < self.today
-        
         for i in df[historical_mask].index:
             idx = df.index.get_loc(i)
             
@@ -332,7 +331,12 @@ class Forecast18MonthPlusV2:
         
         return df, sales_velocity_adj
     
-    def _calc_forecast_columns(self, df: pd.DataFrame, sales_velocity_adj: float) -> pd.DataFrame:
+    def _calc_forecast_columns(
+        self,
+        df: pd.DataFrame,
+        sales_velocity_adj: float,
+        future_mask: np.ndarray
+    ) -> pd.DataFrame:
         """
         Calculate O and P columns.
         
@@ -344,7 +348,6 @@ class Forecast18MonthPlusV2:
         
         # Column O: adj_forecast
         df['adj_forecast'] = np.nan
-        future_mask = df['week_end'] >= self.today
         
         for i in df[future_mask].index:
             prior_year_smooth = df.loc[i, 'prior_year_final_smooth']
@@ -384,7 +387,8 @@ class Forecast18MonthPlusV2:
         self,
         df: pd.DataFrame,
         initial_inventory: int,
-        inv_type: str
+        inv_type: str,
+        future_mask: np.ndarray
     ) -> Tuple[pd.DataFrame, float]:
         """
         Calculate inventory tracking - EXACT Excel formulas.
@@ -398,66 +402,71 @@ class Forecast18MonthPlusV2:
         """
         prefix = 'total' if inv_type == 'total' else 'fba'
         
-        df[f'{prefix}_remaining'] = np.nan
-        df[f'{prefix}_start_of_week'] = np.nan
-        df[f'{prefix}_fraction_runout'] = np.nan
-        df[f'{prefix}_runout_date'] = pd.NaT
-        
-        # Find first forecast row (where final_adj_forecast is not NaN)
-        future_mask = df['week_end'] >= self.today
-        forecast_rows = df[future_mask & df['final_adj_forecast'].notna()].index.tolist()
-        
-        if not forecast_rows:
+        # Add all four tracking columns in one block instead of four inserts
+        n = len(df)
+        new_cols = pd.DataFrame({
+            f'{prefix}_remaining': np.full(n, np.nan),
+            f'{prefix}_start_of_week': np.full(n, np.nan),
+            f'{prefix}_fraction_runout': np.full(n, np.nan),
+            f'{prefix}_runout_date': pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]'),
+        }, index=df.index)
+        df = pd.concat([df, new_cols], axis=1)
+        
+        # Find forecast rows (where final_adj_forecast is not NaN)
+        forecast_mask = future_mask & df['final_adj_forecast'].notna().to_numpy()
+
+        if not forecast_mask.any():
             return df, 0
-        
-        first_forecast_idx = forecast_rows[0]
-        
-        # Calculate cumulative sum from first forecast row
-        cumulative = 0
-        runout_date = None
-        
-        for i in forecast_rows:
-            forecast = df.loc[i, 'final_adj_forecast']
-            week_date = df.loc[i, 'week_end']
-            
-            if pd.isna(forecast):
-                continue
-            
-            cumulative += forecast
-            
-            # Column Q/W: remaining = initial - cumulative
-            remaining = initial_inventory - cumulative
-            df.loc[i, f'{prefix}_remaining'] = remaining
-            
-            # Column R/X: start_of_week = remaining + forecast
-            start_of_week = remaining + forecast
-            df.loc[i, f'{prefix}_start_of_week'] = start_of_week
-            
-            # Column S/Y: fraction when inventory runs out
-            if remaining <= 0 and start_of_week > 0 and forecast > 0:
-                fraction = start_of_week / forecast
-                df.loc[i, f'{prefix}_fraction_runout'] = fraction
-                
-                # Column T/Z: mid_week_runout_date = A - 7 + (fraction * 7)
-                runout = week_date - timedelta(days=7) + timedelta(days=fraction * 7)
-                df.loc[i, f'{prefix}_runout_date'] = runout
-                
-                # Column U/AA: first non-empty runout date
-                if runout_date is None:
-                    runout_date = runout
-        
+
+        forecast = df['final_adj_forecast'].to_numpy(dtype=float)[forecast_mask]
+        remaining, start_of_week, fraction = self._scan_runout(forecast, initial_inventory)
+
+        # Columns Q/W, R/X, S/Y
+        df.loc[forecast_mask, f'{prefix}_remaining'] = remaining
+        df.loc[forecast_mask, f'{prefix}_start_of_week'] = start_of_week
+        df.loc[forecast_mask, f'{prefix}_fraction_runout'] = fraction
+
+        # Column T/Z: mid_week_runout_date = A - 7 + (fraction * 7)
+        runs_out = ~np.isnan(fraction)
+        week_dates = df['week_end'].to_numpy()[forecast_mask]
+        runout = (
+            week_dates[runs_out] - np.timedelta64(7, 'D')
+            + pd.to_timedelta(fraction[runs_out] * 7, unit='D').to_numpy()
+        )
+        df.loc[df.index[forecast_mask][runs_out], f'{prefix}_runout_date'] = runout
+
+        # Column U/AA: first non-empty runout date
         # Column V/AB: DOI = runout_date - TODAY()
-        if runout_date is not None:
-            doi = (runout_date - self.today).days
+        if len(runout) > 0:
+            doi = (pd.Timestamp(runout[0]) - self.today).days
         else:
             doi = 365  # Max if doesn't run out
-        
+
         return df, max(0, doi)
+
+    @staticmethod
+    def _scan_runout(
+        forecast: np.ndarray,
+        initial_inventory: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Inventory drawdown over consecutive forecast weeks (Columns Q, R, S).
+
+        Vectorized as a single cumulative sum so the total and FBA scans are
+        each one NumPy pass instead of a per-row Python loop.
+        """
+        remaining = initial_inventory - np.cumsum(forecast)
+        start_of_week = remaining + forecast
+        runs_out = (remaining <= 0) & (start_of_week > 0) & (forecast > 0)
+        fraction = np.full(len(forecast), np.nan)
+        fraction[runs_out] = start_of_week[runs_out] / forecast[runs_out]
+        return remaining, start_of_week, fraction
     
     def _calc_production_numbers(
         self,
         df: pd.DataFrame,
-        total_inventory: int
+        total_inventory: int,
+        future_mask: np.ndarray
     ) -> Tuple[pd.DataFrame, float, int]:
         """
         Calculate production columns - EXACT Excel formula.
@@ -477,8 +486,6 @@ class Forecast18MonthPlusV2:
                  self.settings.manufacture_lead_time
         )
         
-        future_mask = df['week_end'] >= self.today
-        
         for i in df[future_mask].index:
             week_end = df.loc[i, 'week_end']
             week_start = week_end - timedelta(days=7)
@@ -3,22 +3,126 @@ Database Utilities for Performance Optimization.
 
 Supports both SQLite and PostgreSQL with automatic detection.
 """
-from sqlalchemy import event, text
+from contextlib import contextmanager
+from types import SimpleNamespace
+from flask import current_app, has_request_context
+from sqlalchemy import event, inspect, text
 from app import db
 
 
+# Indexes dropped from the models; sync_indexes() removes them from existing databases
+RETIRED_INDEXES = [
+    'ix_units_sold_asin_week',   # superseded by ix_units_sold_asin_week_units
+    'ix_units_sold_asin_units',  # superseded by ix_units_sold_asin_week_units
+    # Single-column asin indexes - the composites leading with asin cover them
+    'ix_units_sold_asin',
+    'ix_fba_inventory_asin',
+    'ix_forecast_cache_asin',
+    'ix_vine_claims_asin',
+    'ix_units_sold_week_date',   # B-tree replaced by BRIN ix_units_sold_week_date_brin
+    'ix_forecast_cache_settings_hash',  # never filtered on; uq_forecast_cache covers uniqueness
+    'ix_forecast_cache_algorithm',      # never filtered on alone; ix_forecast_cache_asin_algo covers lookups
+    'ix_fba_inventory_snapshot_date',   # B-tree replaced by BRIN ix_fba_snapshot_brin
+    'ix_vine_claims_claim_date',        # B-tree replaced by BRIN ix_vine_claims_date_brin
+    'ix_fba_asin_available',            # superseded by covering ix_fba_asin_inventory
+    'ix_awd_inventory_asin',            # covered by the asin prefix of ix_awd_asin_inventory
+    'ix_awd_asin_available',            # superseded by covering ix_awd_asin_inventory
+]
+
+# Most SQL statements a cold request may issue (GET unless the route names a
+# method). None of these grow with the number of products, so a per-ASIN
+# query loop (N+1) blows the budget on any dataset.
+QUERY_BUDGETS = {
+    '/api/stats': 1,
+    '/api/products': 2,
+    '/api/products/{asin}': 1,
+    '/api/products/{asin}/sales': 1,
+    '/api/fba-inventory': 2,
+    '/api/fba-inventory/{asin}': 1,
+    '/api/awd-inventory': 2,
+    '/api/awd-inventory/{asin}': 1,
+    '/api/forecast/all': 10,
+    '/api/forecast/refresh/status': 1,
+    '/api/forecast/{asin}': 6,
+    '/api/forecast/{asin}/calculate': 6,
+    '/api/forecast/{asin}/details': 2,
+    '/api/forecast/{asin}/chart': 9,
+    '/api/forecast/{asin}/tps': 6,
+    'POST /api/forecast/batch': 4,
+    '/api/labels': 1,
+    '/api/labels/needed': 4,
+    '/api/labels/schedule': 4,
+}
+
+# JSON bodies for the non-GET routes above ({asin} as in the URLs)
+QUERY_BUDGET_BODIES = {
+    'POST /api/forecast/batch': {'asins': ['{asin}']},
+}
+
+
+@contextmanager
+def _borrow_connection(conn=None):
+    """Yield the caller's connection, or open (and close) a fresh one."""
+    if conn is not None:
+        yield conn
+        return
+    with db.engine.connect() as owned:
+        yield owned
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Count the SQL statements executed on the engine inside the block.
+    
+    Usage:
+        with count_queries() as queries:
+            client.get('/api/forecast/all')
+        print(queries.count, queries.statements)
+    """
+    engine = engine if engine is not None else db.engine
+    queries = SimpleNamespace(count=0, statements=[])
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.count += 1
+        queries.statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def set_statement_timeout(conn, timeout_ms):
+    """Cap the statements of the connection's current transaction (PostgreSQL)."""
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def _request_statement_timeout(session, transaction, connection):
+    """Session hook: only transactions begun inside a request are capped."""
+    if has_request_context() and connection.dialect.name == 'postgresql':
+        timeout_ms = current_app.config.get('STATEMENT_TIMEOUT_MS')
+        if timeout_ms:
+            set_statement_timeout(connection, timeout_ms)
+
+
 def apply_sqlite_optimizations(app):
     """
     Apply database-specific performance optimizations.
     
     For SQLite: Applies PRAGMAs for WAL mode, cache, etc.
-    For PostgreSQL: No special connection-level settings needed.
+    For PostgreSQL: No connection PRAGMAs; transactions begun while serving
+    a request get STATEMENT_TIMEOUT_MS.
     """
     # Check if using SQLite
     db_url = str(app.config.get('SQLALCHEMY_DATABASE_URI', ''))
     is_sqlite = db_url.startswith('sqlite')
     
     if not is_sqlite:
+        if (app.config.get('STATEMENT_TIMEOUT_MS')
+                and not event.contains(db.session, 'after_begin', _request_statement_timeout)):
+            event.listen(db.session, 'after_begin', _request_statement_timeout)
         app.logger.info("Using PostgreSQL - no connection PRAGMAs needed")
         return
     
@@ -26,9 +130,18 @@ def apply_sqlite_optimizations(app):
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
         
+        # Page size - 8KB pages; only takes effect before the first write
+        cursor.execute("PRAGMA page_size=8192")
+        
         # WAL mode - Allows concurrent reads while writing
         cursor.execute("PRAGMA journal_mode=WAL")
         
+        # Checkpoint every 2000 pages so bursty writers don't checkpoint mid-request
+        cursor.execute("PRAGMA wal_autocheckpoint=2000")
+        
+        # Wait up to 5s on a locked database instead of failing with SQLITE_BUSY
+        cursor.execute("PRAGMA busy_timeout=5000")
+        
         # Memory-mapped I/O - Faster file access (256MB)
         cursor.execute("PRAGMA mmap_size=268435456")
         
@@ -45,6 +158,13 @@ def apply_sqlite_optimizations(app):
         cursor.execute("PRAGMA foreign_keys=ON")
         
         cursor.close()
+    
+    @event.listens_for(db.engine, "close")
+    def optimize_sqlite_on_close(dbapi_connection, connection_record):
+        # Let SQLite refresh planner statistics it found stale during the session
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA optimize")
+        cursor.close()
 
 
 def analyze_tables():
@@ -52,6 +172,7 @@ def analyze_tables():
     Run ANALYZE on all tables to update query planner statistics.
     
     Call this after bulk data loading for optimal query plans.
+    Commits, so it opens its own connection rather than borrowing one.
     """
     with db.engine.connect() as conn:
         conn.execute(text("ANALYZE"))
@@ -65,16 +186,55 @@ def vacuum_database():
     
     Reclaims space and defragments the database.
     Call periodically or after large deletions.
+    
+    VACUUM cannot run inside a transaction, so it is issued in autocommit
+    mode rather than through SQLAlchemy's implicit BEGIN - on a connection
+    opened here, never one borrowed from a caller.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            conn.execute(text("VACUUM ANALYZE"))
+    else:
+        raw = db.engine.raw_connection()
+        try:
+            sqlite_conn = raw.driver_connection
+            previous = sqlite_conn.isolation_level
+            sqlite_conn.isolation_level = None
+            try:
+                sqlite_conn.execute("VACUUM")
+            finally:
+                sqlite_conn.isolation_level = previous
+        finally:
+            raw.close()
+    print("[DB] VACUUM complete - database optimized")
+
+
+def sync_indexes():
+    """
+    Bring an existing database's indexes in line with the models.
+    
+    db.create_all() only builds indexes together with new tables, so this
+    drops RETIRED_INDEXES and creates any model index that is missing.
+    Safe to run repeatedly. Commits, so it opens its own connection.
     """
     with db.engine.connect() as conn:
-        conn.execute(text("VACUUM"))
+        for name in RETIRED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        
+        inspector = inspect(conn)
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
         conn.commit()
-    print("[DB] VACUUM complete - database optimized")
+    print("[DB] Indexes synced with models")
 
 
-def get_index_stats():
+def get_index_stats(conn=None):
     """Get statistics about indexes for debugging."""
-    with db.engine.connect() as conn:
+    with _borrow_connection(conn) as conn:
         result = conn.execute(text("""
             SELECT name, tbl_name 
             FROM sqlite_master 
@@ -95,19 +255,42 @@ def get_index_stats():
     return indexes
 
 
-def get_table_stats():
-    """Get row counts for all tables."""
+def get_table_stats(conn=None):
+    """
+    Get row counts for all tables.
+    
+    On PostgreSQL the counts are planner estimates from pg_class.reltuples
+    (refreshed by ANALYZE), fetched in one round-trip instead of a full
+    COUNT(*) scan per table. SQLite counts are exact, batched via UNION ALL.
+    """
     tables = ['products', 'units_sold', 'fba_inventory', 'awd_inventory', 'forecast_cache']
-    stats = {}
+    stats = {table: 'N/A' for table in tables}
     
-    with db.engine.connect() as conn:
-        for table in tables:
-            try:
-                result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                count = result.scalar()
-                stats[table] = count
-            except Exception:
-                stats[table] = 'N/A'
+    # Probes run inside SAVEPOINTs: a failed one rolls back only itself, never
+    # the transaction of a connection borrowed from the caller
+    with _borrow_connection(conn) as conn:
+        try:
+            with conn.begin_nested():
+                if db.engine.dialect.name == 'postgresql':
+                    result = conn.execute(
+                        text("SELECT relname, reltuples::bigint FROM pg_class "
+                             "WHERE relkind = 'r' AND relname = ANY(:names)"),
+                        {'names': tables}
+                    ).all()
+                else:
+                    result = conn.execute(text(" UNION ALL ".join(
+                        f"SELECT '{table}', COUNT(*) FROM {table}" for table in tables
+                    ))).all()
+            for table, count in result:
+                stats[table] = max(int(count), 0)
+        except Exception:
+            # A missing table fails the whole batch - fall back to per-table counts
+            for table in tables:
+                try:
+                    with conn.begin_nested():
+                        stats[table] = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                except Exception:
+                    stats[table] = 'N/A'
     
     print("\n[DB] Table Statistics:")
     print("-" * 30)
@@ -117,6 +300,43 @@ def get_table_stats():
     return stats
 
 
+def check_query_budgets(app, asin=None):
+    """
+    Request every QUERY_BUDGETS route and compare its statement count to the budget.
+    
+    Per-ASIN routes use `asin` (default: the first product), and POST routes
+    send their QUERY_BUDGET_BODIES payload. Returns the URLs that went over
+    budget, so a CI step can fail on N+1 regressions.
+    """
+    if asin is None:
+        asin = db.session.execute(text("SELECT asin FROM products LIMIT 1")).scalar()
+    if asin is None:
+        print("[DB] No products loaded - nothing to check")
+        return []
+    
+    client = app.test_client()
+    over_budget = []
+    
+    print("\n[DB] Query Budgets:")
+    print("-" * 60)
+    for route, budget in QUERY_BUDGETS.items():
+        method, _, path = route.rpartition(' ')
+        url = path.format(asin=asin)
+        body = QUERY_BUDGET_BODIES.get(route)
+        if body is not None:
+            body = {key: [item.format(asin=asin) for item in items] for key, items in body.items()}
+        with count_queries() as queries:
+            response = client.open(url, method=method or 'GET', json=body)
+            response.get_data()  # streamed bodies run their queries here
+        status = "OK" if queries.count <= budget else "OVER"
+        label = f"{method} {url}" if method else url
+        print(f"  {status:<4} {queries.count:>3}/{budget:<3} {label} ({response.status_code})")
+        if queries.count > budget:
+            over_budget.append(label)
+    print("-" * 60)
+    return over_budget
+
+
 def explain_query(query_string: str):
     """
     Show query execution plan for debugging slow queries.
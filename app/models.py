@@ -16,18 +16,18 @@ class FBAInventory(db.Model):
     FBA Inventory snapshot data.
     
     Index Strategy:
-    - asin: Most common lookup (product queries)
     - sku: SKU-based lookups
-    - snapshot_date: Time-series queries
-    - (asin, snapshot_date): Composite for product history
+    - snapshot_date: BRIN on PostgreSQL - rows are loaded in snapshot order
+    - (asin, snapshot_date): Composite for product history (also serves asin lookups)
+    - (asin, available, inbound_quantity, total_reserved_quantity): Covering index for inventory sums
     """
     __tablename__ = 'fba_inventory'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    snapshot_date = db.Column(db.DateTime, index=True)
+    snapshot_date = db.Column(db.DateTime)
     sku = db.Column(db.String(200), index=True)
     fnsku = db.Column(db.String(100))
-    asin = db.Column(db.String(50), index=True, nullable=False)
+    asin = db.Column(db.String(50), nullable=False)
     product_name = db.Column(db.Text)
     condition = db.Column(db.String(50))
     available = db.Column(db.Integer, default=0)
@@ -80,8 +80,12 @@ class FBAInventory(db.Model):
     __table_args__ = (
         # Composite index for product history queries
         db.Index('ix_fba_asin_snapshot', 'asin', 'snapshot_date'),
-        # Composite index for inventory aggregation
-        db.Index('ix_fba_asin_available', 'asin', 'available'),
+        # Block-range index for time-range pruning (PostgreSQL only)
+        db.Index('ix_fba_snapshot_brin', 'snapshot_date', postgresql_using='brin',
+                 postgresql_with={'pages_per_range': 32}).ddl_if(dialect='postgresql'),
+        # Covering index for the per-ASIN inventory sums - the GROUP BY asin
+        # aggregation reads only these columns, so it never touches the wide row
+        db.Index('ix_fba_asin_inventory', 'asin', 'available', 'inbound_quantity', 'total_reserved_quantity'),
         # Index for supplier filtering
         db.Index('ix_fba_supplier', 'supplier'),
     )
@@ -95,9 +99,9 @@ class AWDInventory(db.Model):
     AWD (Amazon Warehousing and Distribution) Inventory data.
     
     Index Strategy:
-    - asin: Primary lookup key
     - sku: SKU-based lookups
-    - Composite for inventory queries
+    - (asin, available, reserved, inbound, outbound_to_fba units): Covering index
+      for inventory sums (also serves asin lookups)
     """
     __tablename__ = 'awd_inventory'
     
@@ -105,7 +109,7 @@ class AWDInventory(db.Model):
     product_name = db.Column(db.Text)
     sku = db.Column(db.String(200), index=True)
     fnsku = db.Column(db.String(100))
-    asin = db.Column(db.String(50), index=True, nullable=False)
+    asin = db.Column(db.String(50), nullable=False)
     inbound_to_awd_units = db.Column(db.Integer, default=0)
     inbound_to_awd_cases = db.Column(db.Integer, default=0)
     available_in_awd_units = db.Column(db.Integer, default=0)
@@ -127,8 +131,9 @@ class AWDInventory(db.Model):
     auto_replenishment_ratio = db.Column(db.Float)
     
     __table_args__ = (
-        # Composite index for inventory aggregation queries
-        db.Index('ix_awd_asin_available', 'asin', 'available_in_awd_units'),
+        # Covering index for per-ASIN inventory sums - never touches the wide rows
+        db.Index('ix_awd_asin_inventory', 'asin', 'available_in_awd_units', 'reserved_in_awd_units',
+                 'inbound_to_awd_units', 'outbound_to_fba_units'),
     )
     
     def __repr__(self):
@@ -152,7 +157,9 @@ class Product(db.Model):
     size = db.Column(db.String(100))
     
     # Relationship to sales data (lazy='dynamic' for efficient large dataset queries)
-    sales = db.relationship('UnitsSold', backref='product', lazy='dynamic')
+    # lazy='raise': sales are bulk-loaded from UnitsSold directly; use
+    # selectinload(Product.sales) where a route really needs them attached
+    sales = db.relationship('UnitsSold', back_populates='product', lazy='raise')
     
     __table_args__ = (
         # Covering index for common product listing queries
@@ -168,27 +175,36 @@ class UnitsSold(db.Model):
     Weekly units sold data - normalized format for time series.
     
     Index Strategy:
-    - asin: Product lookup (most common)
-    - week_date: Time-series queries
-    - (asin, week_date): Composite for product sales history (CRITICAL)
+    - week_date: BRIN on PostgreSQL - weeks are appended in date order, so block
+      ranges prune time-range scans at a fraction of a B-tree's size
+    - (asin, week_date, units): Covering composite for product sales history (CRITICAL),
+      its asin prefix also serves plain product lookups
     - (week_date, asin): Reverse composite for date-range queries
+    - (asin, week_date) WHERE units > 0: Partial index - first sale date (product
+      age) is the first entry of the ASIN's range instead of a scan past zero weeks
     - product_id: Foreign key lookups
     """
     __tablename__ = 'units_sold'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), index=True)
-    asin = db.Column(db.String(50), index=True, nullable=False)
-    week_date = db.Column(db.Date, index=True, nullable=False)
+    asin = db.Column(db.String(50), nullable=False)
+    week_date = db.Column(db.Date, nullable=False)
     units = db.Column(db.Integer, default=0)
     
+    product = db.relationship('Product', back_populates='sales', lazy='raise')
+    
     __table_args__ = (
-        # CRITICAL: Composite index for sales history queries (most used)
-        db.Index('ix_units_sold_asin_week', 'asin', 'week_date'),
-        # Reverse composite for date-range across products
+        # CRITICAL: Covering index for sales history queries (most used) -
+        # carries units so (asin, week_date, units) reads never touch the table
+        db.Index('ix_units_sold_asin_week_units', 'asin', 'week_date', 'units'),
+        # Reverse composite for date-range across products (also serves week_date alone on SQLite)
         db.Index('ix_units_sold_week_asin', 'week_date', 'asin'),
-        # Covering index for aggregation queries
-        db.Index('ix_units_sold_asin_units', 'asin', 'units'),
+        # Partial index for MIN(week_date) ... WHERE units > 0 (first sale / product age)
+        db.Index('ix_units_sold_asin_first_sale', 'asin', 'week_date',
+                 sqlite_where=db.text('units > 0'), postgresql_where=db.text('units > 0')),
+        # Block-range index for time-range pruning (PostgreSQL only)
+        db.Index('ix_units_sold_week_date_brin', 'week_date', postgresql_using='brin').ddl_if(dialect='postgresql'),
         # Index for finding products with sales above threshold
         db.Index('ix_units_sold_units', 'units'),
     )
@@ -228,8 +244,8 @@ class ForecastCache(db.Model):
     __tablename__ = 'forecast_cache'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    asin = db.Column(db.String(50), index=True, nullable=False)
-    algorithm = db.Column(db.String(50), index=True)  # '18m+', '6-18m', '0-6m'
+    asin = db.Column(db.String(50), nullable=False)
+    algorithm = db.Column(db.String(50))  # '18m+', '6-18m', '0-6m' (or a transition like '6-18m→18m+')
     computed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     expires_at = db.Column(db.DateTime, index=True)
     
@@ -240,8 +256,9 @@ class ForecastCache(db.Model):
     unit_needed_total = db.Column(db.Float)
     sales_velocity_adjustment = db.Column(db.Float)
     
-    # Settings used (for cache invalidation)
-    settings_hash = db.Column(db.String(64), index=True)
+    # Settings used (for cache invalidation) - a short label such as 'default';
+    # only compared through uq_forecast_cache, so it needs no index of its own
+    settings_hash = db.Column(db.String(64))
     
     __table_args__ = (
         # Composite for cache lookup
@@ -287,15 +304,18 @@ class VineClaims(db.Model):
     __tablename__ = 'vine_claims'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    asin = db.Column(db.String(50), index=True, nullable=False)
+    asin = db.Column(db.String(50), nullable=False)
     product_name = db.Column(db.Text)
-    claim_date = db.Column(db.Date, index=True, nullable=False)
+    claim_date = db.Column(db.Date, nullable=False)
     units_claimed = db.Column(db.Integer, default=0)
     vine_status = db.Column(db.String(100))  # e.g., "Awaiting Reviews", "Concluded"
     
     __table_args__ = (
         # Composite index for ASIN + date lookups
         db.Index('ix_vine_claims_asin_date', 'asin', 'claim_date'),
+        # Block-range index for time-range pruning (PostgreSQL only)
+        db.Index('ix_vine_claims_date_brin', 'claim_date', postgresql_using='brin',
+                 postgresql_with={'pages_per_range': 32}).ddl_if(dialect='postgresql'),
     )
     
     def __repr__(self):
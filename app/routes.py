@@ -1,11 +1,324 @@
 """API routes for product forecasting application."""
-from flask import Blueprint, jsonify, request
+import gzip
+import hashlib
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import astuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import numpy as np
+import orjson
+import pandas as pd
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
 from app import db
-from app.models import FBAInventory, AWDInventory, Product, UnitsSold, LabelInventory, VineClaims, ProductSearchVolume, ForecastCache
-from sqlalchemy import func
+from app.models import FBAInventory, AWDInventory, Product, UnitsSold, LabelInventory, VineClaims, ProductSearchVolume, ForecastCache, Seasonality
+from app.services.forecast_service import (
+    forecast_service, PARALLEL_MIN_BATCH, discard_process_pool, get_process_pool, process_pool_workers
+)
+from app.services.cache_service import cache_service
+from app.db_utils import set_statement_timeout
+from app.algorithms.forecast_18m_plus import ForecastSettings
+from app.algorithms.algorithms_tps import (
+    calculate_forecast_18m_plus as tps_18m,
+    calculate_forecast_6_18m as tps_6_18m,
+    calculate_forecast_0_6m_exact as tps_0_6m,
+    DEFAULT_SETTINGS
+)
+from sqlalchemy import func, select, text, true
+from sqlalchemy.exc import DBAPIError
 
 api_bp = Blueprint('api', __name__)
 
+# Serialized /forecast/all bodies keyed by ETag (oldest evicted first);
+# each entry holds the JSON bytes and, once a client asked for it, the gzip bytes
+_FORECAST_ALL_CACHE = OrderedDict()
+_FORECAST_ALL_CACHE_SIZE = 32
+# Entries are rebuilt after this long even if the fingerprint still matches
+_FORECAST_ALL_CACHE_TTL_SECONDS = 300
+
+# Every table a /forecast/all response is built from; label_inventory is
+# created outside the app, so it is optional like the label counts it feeds
+_FORECAST_ALL_TABLES = tuple(model.__tablename__ for model in (
+    Product, UnitsSold, FBAInventory, AWDInventory, VineClaims,
+    ProductSearchVolume, Seasonality, ForecastCache
+))
+_FORECAST_ALL_OPTIONAL_TABLES = (LabelInventory.__tablename__,)
+
+# Guards the LRU bookkeeping above - gunicorn serves requests from several threads
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# Runs the _start_loads fan-out for every request thread of the process, so at
+# most this many extra pooled connections are open at once (one /forecast/all
+# worth) on top of each thread's session connection - see DEPLOY_AWS.md
+_LOAD_FANOUT_WORKERS = 5
+_LOAD_EXECUTOR = ThreadPoolExecutor(max_workers=_LOAD_FANOUT_WORKERS, thread_name_prefix='db-load')
+
+# JSON bodies smaller than this aren't worth gzipping
+_GZIP_MIN_SIZE = 1024
+
+# /forecast/<asin>, /chart, /calculate and /tps JSON bodies keyed by
+# (endpoint, asin, today, TTL window, data version, request params) - see _memoized_forecast
+_FORECAST_DATA_CACHE = OrderedDict()
+_FORECAST_DATA_CACHE_SIZE = 4096
+# The data version is aggregates, not change counters, so keys (and ETags)
+# also roll over at least this often
+_FORECAST_DATA_CACHE_TTL_SECONDS = 300
+
+# Uncached /forecast/all rows: TPS summary per product, keyed by a hash of every
+# input, so a sync only recalculates the products whose data actually changed
+_TPS_RESULT_CACHE = OrderedDict()
+_TPS_RESULT_CACHE_SIZE = 10000
+
+# The background /forecast/refresh of this process (one at a time)
+_REFRESH_JOB = {'thread': None, 'started_at': None, 'finished_at': None, 'stats': None, 'error': None}
+_REFRESH_JOB_LOCK = threading.Lock()
+
+# Every label_inventory column, selected as plain rows rather than ORM instances
+_LABEL_COLUMNS = (
+    LabelInventory.asin, LabelInventory.product_name, LabelInventory.size,
+    LabelInventory.label_id, LabelInventory.label_status, LabelInventory.label_inventory
+)
+
+# Shared settings for requests without overrides (read-only - the algorithm never mutates it)
+_DEFAULT_FORECAST_SETTINGS = ForecastSettings()
+
+
+def _forecast_settings(data):
+    """ForecastSettings from request params, reusing instances for repeated values."""
+    if not data:
+        return _DEFAULT_FORECAST_SETTINGS
+    return _cached_forecast_settings(
+        data.get('amazon_doi_goal', 93),
+        data.get('inbound_lead_time', 30),
+        data.get('manufacture_lead_time', 7),
+        data.get('market_adjustment', 0.05),
+        data.get('sales_velocity_adj_weight', 0.15)
+    )
+
+
+@lru_cache(maxsize=128)
+def _cached_forecast_settings(amazon_doi_goal, inbound_lead_time, manufacture_lead_time,
+                              market_adjustment, sales_velocity_adj_weight):
+    return ForecastSettings(
+        amazon_doi_goal=int(amazon_doi_goal),
+        inbound_lead_time=int(inbound_lead_time),
+        manufacture_lead_time=int(manufacture_lead_time),
+        market_adjustment=float(market_adjustment),
+        sales_velocity_adj_weight=float(sales_velocity_adj_weight)
+    )
+
+
+def _lru_get(cache, key):
+    """Cached value for `key`, marked most recently used (None on a miss)."""
+    with _RESPONSE_CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache, key, value, max_size):
+    """Store `value`, evicting the least recently used entries beyond max_size."""
+    with _RESPONSE_CACHE_LOCK:
+        cache[key] = value
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def _with_etag(response, etag):
+    """Tag a response so clients revalidate it with If-None-Match."""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=60, must-revalidate'
+    return response
+
+
+def _revalidated(etag):
+    """304 Not Modified for a client that already holds `etag`."""
+    return _with_etag(Response(status=304), etag)
+
+
+def _accepts_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+
+def _gzip(data):
+    """gzip without a timestamp, so the same body always compresses to the same bytes."""
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+@api_bp.after_request
+def _compress_json(response):
+    """
+    Gzip JSON bodies of 1KB+ for clients that accept it.
+    
+    Registered before _add_body_etag so it runs after it (Flask runs
+    after_request hooks in reverse): the ETag is taken from the plain body,
+    then weakened because the gzip bytes are a different representation.
+    Streamed responses (ndjson, /forecast/batch) are left alone.
+    """
+    if response.mimetype != 'application/json':
+        return response
+    response.vary.add('Accept-Encoding')
+    
+    if (response.status_code == 200 and not response.is_streamed
+            and 'Content-Encoding' not in response.headers and _accepts_gzip()):
+        body = response.get_data()
+        if len(body) >= _GZIP_MIN_SIZE:
+            response.set_data(_gzip(body))
+            response.headers['Content-Encoding'] = 'gzip'
+    
+    if response.headers.get('Content-Encoding') == 'gzip':
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+
+@api_bp.after_request
+def _add_body_etag(response):
+    """
+    ETag plain GET responses by body hash so repeat clients get a bodiless 304.
+    
+    Routes that fingerprint their inputs set their own ETag up front and
+    skip the handler entirely; streamed bodies are left alone.
+    """
+    if (request.method == 'GET' and response.status_code == 200
+            and not response.is_streamed and 'ETag' not in response.headers):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
+def _paginate_rows(model, columns, page, per_page):
+    """
+    One page of plain row mappings plus total/pages, like Query.paginate().
+    
+    Selects only the listed columns through Core, so no ORM objects are built.
+    """
+    page = max(page, 1)
+    per_page = per_page if per_page > 0 else 20
+    total = db.session.execute(select(func.count()).select_from(model)).scalar()
+    rows = db.session.execute(
+        select(*columns).limit(per_page).offset((page - 1) * per_page)
+    ).mappings().all()
+    pages = math.ceil(total / per_page) if total else 0
+    return rows, total, pages
+
+
+def _seek_rows(model, columns, after_id, per_page):
+    """
+    One keyset page: rows with id > after_id in id order, plus the next cursor.
+    
+    Seeks on the primary key, so a deep page costs the same as the first
+    (no OFFSET scan, no COUNT). The cursor is None on the last page.
+    """
+    per_page = per_page if per_page > 0 else 20
+    rows = db.session.execute(
+        select(*columns).where(model.id > after_id).order_by(model.id).limit(per_page)
+    ).mappings().all()
+    next_after_id = rows[-1]['id'] if len(rows) == per_page else None
+    return rows, next_after_id
+
+
+def _sort_rows(rows, key, reverse=False, text=False):
+    """
+    Stably sort payload rows by one field (missing values as 0, or '' if text).
+    
+    Numeric sorts are a stable argsort in C instead of a Python key call per
+    row; negating the keys keeps ties in input order like reverse=True.
+    """
+    if text:
+        return sorted(rows, key=lambda row: row.get(key) or '', reverse=reverse)
+    keys = np.fromiter((row.get(key) or 0 for row in rows), dtype=float, count=len(rows))
+    ranking = np.argsort(-keys if reverse else keys, kind='stable')
+    return [rows[i] for i in ranking.tolist()]
+
+
+class _SalesByAsin:
+    """
+    Weekly sales for every ASIN, fetched as columns and sliced per ASIN on demand.
+    
+    get(asin) returns the same [{'week_end', 'units'}, ...] list the algorithms
+    expect, but those per-row dicts are only built for ASINs actually calculated.
+    first_sales() derives each ASIN's first week with units > 0 from the same
+    columns, so callers don't need a separate MIN(week_date) GROUP BY scan.
+    
+    Pass `asins` to load only those ASINs' rows (an empty collection loads nothing).
+    """
+    
+    def __init__(self, asins=None):
+        query = select(UnitsSold.asin, UnitsSold.week_date, UnitsSold.units)
+        if asins is not None:
+            query = query.where(UnitsSold.asin.in_(list(asins)))
+        
+        # yield_per streams through a server-side cursor (named cursor on psycopg2);
+        # each partition is folded into compact columns and then dropped
+        partitions = db.session.execute(
+            query.order_by(UnitsSold.asin, UnitsSold.week_date),
+            execution_options={'yield_per': 10000}
+        ).partitions() if asins is None or asins else []
+        keys, starts, week_chunks, self._units = [], [], [], []
+        total = 0
+        for partition in partitions:
+            a, w, u = zip(*partition)
+            week_chunks.append(np.array(w, dtype='datetime64[D]'))
+            self._units.extend(u)
+            
+            # Rows are ordered by ASIN, so only the first row of each run is kept
+            asins = np.asarray(a)
+            run_starts = np.flatnonzero(np.r_[True, asins[1:] != asins[:-1]])
+            for key, start in zip(asins[run_starts].tolist(), (run_starts + total).tolist()):
+                if not keys or key != keys[-1]:
+                    keys.append(key)
+                    starts.append(start)
+            total += len(partition)
+        
+        self._weeks = np.concatenate(week_chunks) if week_chunks else np.array([], dtype='datetime64[D]')
+        # Each ASIN is one contiguous [start, end) span of the columns
+        self._spans = dict(zip(keys, zip(starts, starts[1:] + [total])))
+    
+    def first_sales(self):
+        """Map ASIN -> earliest week_date with units > 0 (ASINs with no sales are omitted)."""
+        if not self._spans:
+            return {}
+        sold = np.flatnonzero(np.array(self._units, dtype=float) > 0)
+        asins = list(self._spans)
+        starts, ends = np.array(list(self._spans.values())).T
+        # First positive row at or after each span's start, kept if it is inside the span
+        first = np.searchsorted(sold, starts)
+        first_row = sold[np.minimum(first, len(sold) - 1)] if len(sold) else first
+        inside = (first < len(sold)) & (first_row < ends)
+        hits = np.flatnonzero(inside)
+        return dict(zip(
+            [asins[i] for i in hits.tolist()],
+            self._weeks[first_row[hits]].tolist()
+        ))
+    
+    @staticmethod
+    def first_sales_query():
+        """Map ASIN -> earliest week_date with units > 0, aggregated in the database."""
+        return dict(db.session.execute(
+            select(UnitsSold.asin, func.min(UnitsSold.week_date))
+            .where(UnitsSold.units > 0)
+            .group_by(UnitsSold.asin)
+        ).all())
+    
+    def get(self, asin, default=None):
+        span = self._spans.get(asin)
+        if span is None:
+            return default
+        start, end = span
+        return [
+            {'week_end': week, 'units': units}
+            for week, units in zip(self._weeks[start:end].tolist(), self._units[start:end])
+        ]
+
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -19,87 +332,141 @@ def health_check():
 @api_bp.route('/stats', methods=['GET'])
 def get_stats():
     """Get database statistics."""
-    stats = {
-        'fba_inventory_count': db.session.query(func.count(FBAInventory.id)).scalar(),
-        'awd_inventory_count': db.session.query(func.count(AWDInventory.id)).scalar(),
-        'products_count': db.session.query(func.count(Product.id)).scalar(),
-        'units_sold_count': db.session.query(func.count(UnitsSold.id)).scalar(),
-    }
-    return jsonify(stats)
+    # All four counts in one round-trip
+    stats = db.session.execute(select(
+        select(func.count(FBAInventory.id)).scalar_subquery().label('fba_inventory_count'),
+        select(func.count(AWDInventory.id)).scalar_subquery().label('awd_inventory_count'),
+        select(func.count(Product.id)).scalar_subquery().label('products_count'),
+        select(func.count(UnitsSold.id)).scalar_subquery().label('units_sold_count'),
+    )).mappings().one()
+    return jsonify(dict(stats))
 
 
 @api_bp.route('/products', methods=['GET'])
 def get_products():
-    """Get all products with pagination."""
+    """
+    Get all products with pagination.
+    
+    Query params:
+        - page / per_page: numbered pages (default: page 1, 50 per page)
+        - after_id: keyset paging instead - rows after this id, with
+          next_after_id for the next page (no total/pages)
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
+    after_id = request.args.get('after_id', type=int)
+    columns = [Product.id, Product.asin, Product.brand, Product.product_name, Product.size]
     
-    pagination = Product.query.paginate(page=page, per_page=per_page, error_out=False)
+    if after_id is not None:
+        rows, next_after_id = _seek_rows(Product, columns, after_id, per_page)
+        return jsonify({
+            'products': [dict(row) for row in rows],
+            'next_after_id': next_after_id
+        })
+    
+    rows, total, pages = _paginate_rows(Product, columns, page, per_page)
     
     return jsonify({
-        'products': [{
-            'id': p.id,
-            'asin': p.asin,
-            'brand': p.brand,
-            'product_name': p.product_name,
-            'size': p.size
-        } for p in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'products': [dict(row) for row in rows],
+        'total': total,
+        'pages': pages,
         'current_page': page
     })
 
 
-@api_bp.route('/products/<asin>', methods=['GET'])
-def get_product(asin):
-    """Get product by ASIN."""
-    product = Product.query.filter_by(asin=asin).first_or_404()
+@api_bp.route('/products/reload-cache', methods=['POST'])
+def reload_product_cache():
+    """
+    Reload the in-process ASIN -> product map (call after a product sync).
+    
+    Only the worker that serves this request reloads; other gunicorn workers
+    pick up the change within PRODUCT_TTL_SECONDS.
+    """
+    forecast_service.invalidate_products()
     return jsonify({
-        'id': product.id,
-        'asin': product.asin,
-        'brand': product.brand,
-        'product_name': product.product_name,
-        'size': product.size
+        'message': 'Product cache reloaded',
+        'products': len(forecast_service.get_products())
     })
 
 
+@api_bp.route('/products/<asin>', methods=['GET'])
+def get_product(asin):
+    """Get product by ASIN (from the per-process product map)."""
+    product = forecast_service.get_product(asin)
+    if product is None:
+        abort(404)
+    return jsonify(dict(product._mapping))
+
+
 @api_bp.route('/products/<asin>/sales', methods=['GET'])
 def get_product_sales(asin):
-    """Get sales history for a product."""
-    sales = UnitsSold.query.filter_by(asin=asin).order_by(UnitsSold.week_date).all()
+    """
+    Get sales history for a product.
+    
+    Query params:
+        - summary: 1 to return only total_units and data_points (no weekly rows)
+    """
+    if request.args.get('summary', '0') == '1':
+        total_units, data_points = db.session.execute(
+            select(func.coalesce(func.sum(UnitsSold.units), 0), func.count())
+            .where(UnitsSold.asin == asin)
+        ).one()
+        return jsonify({
+            'asin': asin,
+            'total_units': total_units,
+            'data_points': data_points
+        })
+    
+    # Totals ride along as window aggregates, so one index-only scan serves everything
+    sales = db.session.execute(
+        select(
+            UnitsSold.week_date,
+            UnitsSold.units,
+            func.coalesce(func.sum(UnitsSold.units).over(), 0).label('total_units'),
+            func.count().over().label('data_points')
+        )
+        .where(UnitsSold.asin == asin)
+        .order_by(UnitsSold.week_date)
+    ).all()
     
     return jsonify({
         'asin': asin,
-        'sales': [{
-            'week_date': s.week_date.isoformat(),
-            'units': s.units
-        } for s in sales],
-        'total_units': sum(s.units for s in sales),
-        'data_points': len(sales)
+        'sales': [{'week_date': s.week_date, 'units': s.units} for s in sales],
+        'total_units': sales[0].total_units if sales else 0,
+        'data_points': sales[0].data_points if sales else 0
     })
 
 
 @api_bp.route('/fba-inventory', methods=['GET'])
 def get_fba_inventory():
-    """Get FBA inventory with pagination."""
+    """
+    Get FBA inventory with pagination.
+    
+    Query params:
+        - page / per_page: numbered pages (default: page 1, 50 per page)
+        - after_id: keyset paging instead - rows after this id, with
+          next_after_id for the next page (no total/pages)
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
+    after_id = request.args.get('after_id', type=int)
+    columns = [FBAInventory.id, FBAInventory.sku, FBAInventory.asin, FBAInventory.product_name,
+         FBAInventory.available, FBAInventory.days_of_supply, FBAInventory.units_shipped_t30,
+         FBAInventory.snapshot_date]
+    
+    if after_id is not None:
+        rows, next_after_id = _seek_rows(FBAInventory, columns, after_id, per_page)
+        return jsonify({
+            'inventory': [dict(row) for row in rows],
+            'next_after_id': next_after_id
+        })
     
-    pagination = FBAInventory.query.paginate(page=page, per_page=per_page, error_out=False)
+    rows, total, pages = _paginate_rows(FBAInventory, columns, page, per_page)
     
     return jsonify({
-        'inventory': [{
-            'id': inv.id,
-            'sku': inv.sku,
-            'asin': inv.asin,
-            'product_name': inv.product_name,
-            'available': inv.available,
-            'days_of_supply': inv.days_of_supply,
-            'units_shipped_t30': inv.units_shipped_t30,
-            'snapshot_date': inv.snapshot_date.isoformat() if inv.snapshot_date else None
-        } for inv in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'inventory': [dict(row) for row in rows],
+        'total': total,
+        'pages': pages,
         'current_page': page
     })
 
@@ -107,47 +474,52 @@ def get_fba_inventory():
 @api_bp.route('/fba-inventory/<asin>', methods=['GET'])
 def get_fba_by_asin(asin):
     """Get FBA inventory for specific ASIN."""
-    inventory = FBAInventory.query.filter_by(asin=asin).all()
+    inventory = db.session.execute(
+        select(
+            FBAInventory.id, FBAInventory.sku, FBAInventory.available, FBAInventory.days_of_supply,
+            FBAInventory.units_shipped_t7, FBAInventory.units_shipped_t30,
+            FBAInventory.units_shipped_t60, FBAInventory.units_shipped_t90,
+            FBAInventory.inbound_quantity, FBAInventory.supplier, FBAInventory.snapshot_date
+        ).where(FBAInventory.asin == asin)
+    ).mappings().all()
     
     return jsonify({
         'asin': asin,
-        'inventory': [{
-            'id': inv.id,
-            'sku': inv.sku,
-            'available': inv.available,
-            'days_of_supply': inv.days_of_supply,
-            'units_shipped_t7': inv.units_shipped_t7,
-            'units_shipped_t30': inv.units_shipped_t30,
-            'units_shipped_t60': inv.units_shipped_t60,
-            'units_shipped_t90': inv.units_shipped_t90,
-            'inbound_quantity': inv.inbound_quantity,
-            'supplier': inv.supplier,
-            'snapshot_date': inv.snapshot_date.isoformat() if inv.snapshot_date else None
-        } for inv in inventory],
+        'inventory': [dict(inv) for inv in inventory],
         'count': len(inventory)
     })
 
 
 @api_bp.route('/awd-inventory', methods=['GET'])
 def get_awd_inventory():
-    """Get AWD inventory with pagination."""
+    """
+    Get AWD inventory with pagination.
+    
+    Query params:
+        - page / per_page: numbered pages (default: page 1, 50 per page)
+        - after_id: keyset paging instead - rows after this id, with
+          next_after_id for the next page (no total/pages)
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
+    after_id = request.args.get('after_id', type=int)
+    columns = [AWDInventory.id, AWDInventory.sku, AWDInventory.asin, AWDInventory.product_name,
+         AWDInventory.available_in_awd_units, AWDInventory.available_in_fba_units,
+         AWDInventory.days_of_supply]
+    
+    if after_id is not None:
+        rows, next_after_id = _seek_rows(AWDInventory, columns, after_id, per_page)
+        return jsonify({
+            'inventory': [dict(row) for row in rows],
+            'next_after_id': next_after_id
+        })
     
-    pagination = AWDInventory.query.paginate(page=page, per_page=per_page, error_out=False)
+    rows, total, pages = _paginate_rows(AWDInventory, columns, page, per_page)
     
     return jsonify({
-        'inventory': [{
-            'id': inv.id,
-            'sku': inv.sku,
-            'asin': inv.asin,
-            'product_name': inv.product_name,
-            'available_in_awd_units': inv.available_in_awd_units,
-            'available_in_fba_units': inv.available_in_fba_units,
-            'days_of_supply': inv.days_of_supply
-        } for inv in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'inventory': [dict(row) for row in rows],
+        'total': total,
+        'pages': pages,
         'current_page': page
     })
 
@@ -155,20 +527,18 @@ def get_awd_inventory():
 @api_bp.route('/awd-inventory/<asin>', methods=['GET'])
 def get_awd_by_asin(asin):
     """Get AWD inventory for specific ASIN."""
-    inventory = AWDInventory.query.filter_by(asin=asin).all()
+    inventory = db.session.execute(
+        select(
+            AWDInventory.id, AWDInventory.sku, AWDInventory.available_in_awd_units,
+            AWDInventory.available_in_awd_cases, AWDInventory.inbound_to_awd_units,
+            AWDInventory.outbound_to_fba_units, AWDInventory.available_in_fba_units,
+            AWDInventory.days_of_supply
+        ).where(AWDInventory.asin == asin)
+    ).mappings().all()
     
     return jsonify({
         'asin': asin,
-        'inventory': [{
-            'id': inv.id,
-            'sku': inv.sku,
-            'available_in_awd_units': inv.available_in_awd_units,
-            'available_in_awd_cases': inv.available_in_awd_cases,
-            'inbound_to_awd_units': inv.inbound_to_awd_units,
-            'outbound_to_fba_units': inv.outbound_to_fba_units,
-            'available_in_fba_units': inv.available_in_fba_units,
-            'days_of_supply': inv.days_of_supply
-        } for inv in inventory],
+        'inventory': [dict(inv) for inv in inventory],
         'count': len(inventory)
     })
 
@@ -177,6 +547,159 @@ def get_awd_by_asin(asin):
 # STATIC FORECAST ROUTES (must be defined BEFORE dynamic routes)
 # =====================================================
 
+def _start_loads(queries, optional=()):
+    """
+    Start independent read queries and return a callable that collects them.
+    
+    On PostgreSQL each query runs on the shared _LOAD_EXECUTOR with its own
+    pooled connection, so the round-trips overlap each other and whatever the
+    caller does before collecting; concurrent requests queue for its threads
+    rather than opening more connections. SQLite reads are local, so they run
+    in order on the request session. The callable returns name -> rows; for
+    names in `optional` a failure comes back as the exception instead of raising.
+    """
+    def outcome(name, run):
+        try:
+            return run()
+        except Exception as e:
+            if name not in optional:
+                raise
+            return e
+    
+    if db.engine.dialect.name != 'postgresql':
+        loaded = {
+            name: outcome(name, lambda query=query: db.session.execute(query).all())
+            for name, query in queries.items()
+        }
+        return lambda: loaded
+    
+    engine = db.engine
+    # The worker threads are outside the request, so the session hook doesn't cap them
+    timeout_ms = current_app.config.get('STATEMENT_TIMEOUT_MS')
+    
+    def run(query):
+        with engine.connect() as conn:
+            if timeout_ms:
+                set_statement_timeout(conn, timeout_ms)
+            return conn.execute(query).all()
+    
+    futures = {name: _LOAD_EXECUTOR.submit(run, query) for name, query in queries.items()}
+    return lambda: {name: outcome(name, future.result) for name, future in futures.items()}
+
+
+def _execute_optional(query, fallback):
+    """
+    Rows of `query`, or of `fallback` if it fails - for fingerprints that
+    also read an optional table (created outside the app) that may be missing.
+    
+    A failed statement aborts a PostgreSQL transaction, so the session is
+    rolled back before the fallback; callers run it first thing in a request,
+    before anything else was read or written.
+    """
+    try:
+        return db.session.execute(query).all()
+    except DBAPIError:
+        db.session.rollback()
+        return db.session.execute(fallback).all()
+
+
+def _table_versions(tables, optional=()):
+    """
+    Cheap change counters for `tables` and whichever `optional` tables exist,
+    in one round-trip.
+    
+    On PostgreSQL these are the insert/update/delete tuple counts from
+    pg_stat_user_tables - a catalog read that moves on every write, including
+    in-place updates and a TRUNCATE ... RESTART IDENTITY reload that ends
+    with the same ids. Counts are published when the writing transaction
+    commits (batched up to about a second), so a sync shows up almost at once.
+    SQLite (development) has no such counters; COUNT(*) and MAX(rowid) stand
+    in, plus the modification times of the database and WAL files, which move
+    on every commit from any process. An in-memory database only has the
+    former, so in-place updates wait for the response cache TTL.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        # Missing tables simply have no row here
+        rows = db.session.execute(
+            text("SELECT relname, n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables "
+                 "WHERE relname = ANY(:names)"),
+            {'names': [*tables, *optional]}
+        )
+        return sorted(tuple(row) for row in rows)
+    
+    def counts(names):
+        return text(" UNION ALL ".join(
+            f"SELECT '{table}', COUNT(*), MAX(rowid) FROM {table}" for table in names
+        ))
+    
+    rows = _execute_optional(counts([*tables, *optional]), counts(tables))
+    path = db.engine.url.database
+    files = [path, f"{path}-wal"] if path and path != ':memory:' else []
+    return sorted(tuple(row) for row in rows) + [
+        os.stat(file).st_mtime_ns for file in files if os.path.exists(file)
+    ]
+
+
+def _forecast_all_etag():
+    """
+    Fingerprint the data and query params behind a /forecast/all response.
+    
+    The change counters of every table the handler reads, plus today's date
+    (product age) and the request args. Without label_inventory the response
+    is built with no label counts, as the handler documents.
+    """
+    versions = _table_versions(_FORECAST_ALL_TABLES, optional=_FORECAST_ALL_OPTIONAL_TABLES)
+    key = f"{versions}|{date.today()}|{sorted(request.args.items(multi=True))}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+# Bad rows for these drop the ASIN from /forecast/all (counted); anything else propagates
+_FORECAST_DATA_ERRORS = (KeyError, ValueError, ZeroDivisionError, TypeError, IndexError)
+
+def _run_tps(algorithm, units_data, vine_claims, product_sv, total_inv, fba_avail,
+             seasonality_data, today, base_settings):
+    """Run the TPS algorithm for a product's age bucket with its inventory applied."""
+    settings = base_settings.copy()
+    settings['total_inventory'] = total_inv
+    settings['fba_available'] = fba_avail
+    
+    if algorithm == "18m+":
+        return tps_18m(units_data, today, settings)
+    elif algorithm == "6-18m":
+        return tps_6_18m(units_data, seasonality_data, today, settings, vine_claims, product_sv)
+    else:  # 0-6m
+        return tps_0_6m(units_data, seasonality_data, vine_claims, today, settings, product_sv)
+
+
+def _run_tps_task(job, shared):
+    """
+    Pool task: (summary, None), or (None, error) for a data problem the caller counts.
+    
+    `job` is the _run_tps() product args and `shared` the (seasonality_data,
+    today, base_settings) every task of the request shares. Only the
+    _tps_summary() fields are pickled back, not the weekly curves.
+    """
+    try:
+        return _tps_summary(_run_tps(*job, *shared)), None
+    except _FORECAST_DATA_ERRORS as e:
+        return None, e
+
+
+def _tps_result_key(job, shared_digest):
+    """Content key for one product's TPS inputs; shared_digest covers today, settings and seasonality."""
+    return hashlib.blake2b(orjson.dumps(job) + shared_digest, digest_size=16).digest()
+
+
+def _tps_summary(result):
+    """The fields /forecast/all reads from a TPS result - all _TPS_RESULT_CACHE keeps."""
+    return {
+        'units_to_make': result['units_to_make'],
+        'doi_total_days': result['doi_total_days'],
+        'doi_fba_days': result['doi_fba_days'],
+        'needs_seasonality': result.get('needs_seasonality', False),
+    }
+
+
 @api_bp.route('/forecast/all', methods=['GET'])
 def get_all_forecasts():
     """
@@ -193,32 +716,57 @@ def get_all_forecasts():
         - inbound_lead_time: Inbound lead time in days (default: 30)
         - manufacture_lead_time: Manufacturing lead time in days (default: 7)
         - market_adjustment: Market adjustment percentage (default: 0.05)
+        - format: 'ndjson' to stream one forecast per line instead of one JSON document
+        - sorted: 'false' (ndjson only) streams rows as they are calculated, unsorted
+        - compact: 'true' drops the legacy aliases (product, doi_total, doi_fba and
+          the top-level forecasts list) for clients that read the canonical names
+    
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified,
+    and repeat requests for unchanged data are served from memory for up to
+    _FORECAST_ALL_CACHE_TTL_SECONDS.
     """
-    from app.algorithms.algorithms_tps import (
-        calculate_forecast_18m_plus as tps_18m,
-        calculate_forecast_6_18m as tps_6_18m,
-        calculate_forecast_0_6m_exact as tps_0_6m,
-        DEFAULT_SETTINGS
-    )
-    from app.models import Seasonality
-    from datetime import date
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    import time
+    etag = _forecast_all_etag()
+    if request.if_none_match.contains_weak(etag):
+        return _revalidated(etag)
     
+    if request.args.get('format') == 'ndjson':
+        response = _build_all_forecasts(stream=True)
+    else:
+        entry = _lru_get(_FORECAST_ALL_CACHE, etag)
+        if entry is None or time.monotonic() - entry['ts'] >= _FORECAST_ALL_CACHE_TTL_SECONDS:
+            entry = {'json': _build_all_forecasts().get_data(), 'gzip': None, 'ts': time.monotonic()}
+            _lru_put(_FORECAST_ALL_CACHE, etag, entry, _FORECAST_ALL_CACHE_SIZE)
+        
+        if _accepts_gzip() and len(entry['json']) >= _GZIP_MIN_SIZE:
+            # Compress once per cached body, not once per request
+            if entry['gzip'] is None:
+                entry['gzip'] = _gzip(entry['json'])
+            response = Response(entry['gzip'], mimetype='application/json',
+                                headers={'Content-Encoding': 'gzip'})
+        else:
+            response = Response(entry['json'], mimetype='application/json')
+    
+    return _with_etag(response, etag)
+
+
+def _build_all_forecasts(stream=False):
+    """
+    Load, calculate and serialize the /forecast/all payload.
+    
+    With stream=True the rows go out as NDJSON; unsorted streams start
+    before the last forecast is calculated.
+    """
     start_time = time.time()
     
-    # Load seasonality data once for 6-18m and 0-6m algorithms (include sv_smooth_env_97)
-    seasonality_records = Seasonality.query.all()
-    seasonality_data = [{
-        'week_of_year': s.week_of_year, 
-        'seasonality_index': s.seasonality_index,
-        'sv_smooth_env_97': s.sv_smooth_env_97
-    } for s in seasonality_records]
+    # Seasonality for 6-18m and 0-6m algorithms (include sv_smooth_env_97), re-read
+    # rather than taken from the process cache - the ETag fingerprinted the table
+    seasonality_data = forecast_service.get_seasonality_data(ttl=0)
     
     # Query params
     brand_filter = request.args.get('brand', None)
     sort_by = request.args.get('sort', 'doi')
     order = request.args.get('order', 'asc')
+    compact = request.args.get('compact') == 'true'
     
     # DOI Settings - allow custom values from frontend
     amazon_doi_goal = request.args.get('amazon_doi_goal', type=int, default=93)
@@ -240,200 +788,237 @@ def get_all_forecasts():
     
     # === BULK LOAD ALL DATA UPFRONT (1 query each instead of N queries) ===
     
-    # Get all products
-    product_query = db.session.query(
-        Product.asin, Product.brand, Product.product_name, Product.size
-    )
-    if brand_filter:
-        product_query = product_query.filter(Product.brand.ilike(f'%{brand_filter}%'))
-    products = {p.asin: p for p in product_query.all()}
-    
-    # Get first sale dates for all products (1 query)
-    first_sales = dict(
-        db.session.query(
-            UnitsSold.asin,
-            func.min(UnitsSold.week_date)
-        ).filter(UnitsSold.units > 0).group_by(UnitsSold.asin).all()
-    )
-    
-    # Get all sales data grouped by ASIN (1 query)
-    all_sales = db.session.query(
-        UnitsSold.asin, UnitsSold.week_date, UnitsSold.units
-    ).order_by(UnitsSold.asin, UnitsSold.week_date).all()
-    
-    sales_by_asin = {}
-    for sale in all_sales:
-        if sale.asin not in sales_by_asin:
-            sales_by_asin[sale.asin] = []
-        sales_by_asin[sale.asin].append({'week_end': sale.week_date, 'units': sale.units})
-    
-    # Get FBA inventory totals (1 query)
-    fba_totals = dict(
-        db.session.query(
-            FBAInventory.asin,
-            func.coalesce(func.sum(FBAInventory.available), 0) + 
-            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0) +
-            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0)
-        ).group_by(FBAInventory.asin).all()
-    )
-    
-    fba_available = dict(
-        db.session.query(
+    # Loads nothing else depends on start first, overlapping the ones below
+    collect_loads = _start_loads({
+        # FBA inventory totals and available units
+        'fba': select(
             FBAInventory.asin,
-            func.coalesce(func.sum(FBAInventory.available), 0)
-        ).group_by(FBAInventory.asin).all()
-    )
-    
-    # Get AWD inventory totals (1 query)
-    awd_totals = dict(
-        db.session.query(
+            func.coalesce(func.sum(FBAInventory.available), 0).label('avail'),
+            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0).label('inb'),
+            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0).label('res')
+        ).group_by(FBAInventory.asin),
+        # AWD inventory totals
+        'awd': select(
             AWDInventory.asin,
             func.coalesce(func.sum(AWDInventory.available_in_awd_units), 0) +
             func.coalesce(func.sum(AWDInventory.inbound_to_awd_units), 0) +
             func.coalesce(func.sum(AWDInventory.reserved_in_awd_units), 0) +
             func.coalesce(func.sum(AWDInventory.outbound_to_fba_units), 0)
-        ).group_by(AWDInventory.asin).all()
-    )
-    
-    # Get all vine claims (1 query)
-    all_vine_claims = VineClaims.query.all()
-    vine_claims_by_asin = {}
-    for vc in all_vine_claims:
-        if vc.asin not in vine_claims_by_asin:
-            vine_claims_by_asin[vc.asin] = []
-        vine_claims_by_asin[vc.asin].append({
-            'claim_date': vc.claim_date,
-            'units_claimed': vc.units_claimed
-        })
-    
-    # Get all per-product search volume (1 query)
-    all_product_sv = ProductSearchVolume.query.all()
-    product_sv_by_asin = {}
-    for sv in all_product_sv:
-        if sv.asin not in product_sv_by_asin:
-            product_sv_by_asin[sv.asin] = []
-        product_sv_by_asin[sv.asin].append({
-            'week_date': sv.week_date,
-            'search_volume': sv.search_volume
-        })
+        ).group_by(AWDInventory.asin),
+        # All vine claims and per-product search volume
+        'vine': select(VineClaims.asin, VineClaims.claim_date, VineClaims.units_claimed),
+        'sv': select(ProductSearchVolume.asin, ProductSearchVolume.week_date, ProductSearchVolume.search_volume),
+        # Label inventory (optional - a failure only drops label counts)
+        'labels': select(LabelInventory.asin, LabelInventory.label_inventory),
+    }, optional={'labels'})
     
-    # Get all label inventory (1 query)
-    label_inv_by_asin = {}
-    try:
-        all_label_inv = LabelInventory.query.all()
-        for li in all_label_inv:
-            label_inv_by_asin[li.asin] = li.label_inventory or 0
-    except Exception as e:
-        print(f"Warning: Could not load label inventory: {e}")
+    # Get all products
+    product_query = db.session.query(
+        Product.asin, Product.brand, Product.product_name, Product.size
+    )
+    if brand_filter:
+        product_query = product_query.filter(Product.brand.ilike(f'%{brand_filter}%'))
+    product_rows = product_query.all()
     
     # Get all cached forecasts (1 query) - use calibrated values for accuracy
     cache_by_asin = {}
     try:
-        all_cached = ForecastCache.query.all()
+        all_cached = db.session.execute(select(
+            ForecastCache.asin, ForecastCache.units_to_make, ForecastCache.doi_total_days,
+            ForecastCache.doi_fba_available_days, ForecastCache.algorithm
+        )).all()
         for c in all_cached:
             cache_by_asin[c.asin] = c
     except Exception as e:
         print(f"Warning: Could not load forecast cache: {e}")
     
+    # Only products without a cached forecast run the algorithms
+    uncached_asins = {row.asin for row in product_rows if row.asin not in cache_by_asin}
+    
+    # Cached products only need their first sale date, so with a warm cache the
+    # database aggregates those and weekly rows are fetched for the rest only
+    if cache_by_asin:
+        first_sales = _SalesByAsin.first_sales_query()
+        sales_by_asin = _SalesByAsin(asins=uncached_asins)
+    else:
+        # Cold cache: every product is calculated - one scan gives both (1 query)
+        sales_by_asin = _SalesByAsin()
+        first_sales = sales_by_asin.first_sales()
+    
+    # Wait for the fanned-out loads (FBA, AWD, vine, search volume, labels)
+    loaded = collect_loads()
+    
+    fba_totals = {row.asin: row.avail + row.inb + row.res for row in loaded['fba']}
+    fba_available = {row.asin: row.avail for row in loaded['fba']}
+    
+    awd_totals = dict(loaded['awd'])
+    
+    # Vine claims and search volume stay column tuples except for the products
+    # the algorithms will see, so a warm cache builds (almost) no per-row dicts
+    vine_claims_by_asin = defaultdict(list)
+    for asin, claim_date, units_claimed in loaded['vine']:
+        if asin in uncached_asins:
+            vine_claims_by_asin[asin].append({
+                'claim_date': claim_date,
+                'units_claimed': units_claimed
+            })
+    
+    product_sv_by_asin = defaultdict(list)
+    for asin, week_date, search_volume in loaded['sv']:
+        if asin in uncached_asins:
+            product_sv_by_asin[asin].append({
+                'week_date': week_date,
+                'search_volume': search_volume
+            })
+    
+    label_inv_by_asin = {}
+    if isinstance(loaded['labels'], Exception):
+        print(f"Warning: Could not load label inventory: {loaded['labels']}")
+    else:
+        for asin, label_inventory in loaded['labels']:
+            label_inv_by_asin[asin] = label_inventory or 0
+    
     load_time = time.time() - start_time
     
     # === CALCULATE FORECASTS (using cache when available) ===
     
-    def calculate_single(asin):
+    # Inventory, age and algorithm branch for every product in one vectorized pass
+    # (text columns stay Python objects - a str dtype would turn NULL brands into NaN)
+    batch = pd.DataFrame(product_rows, columns=['asin', 'brand', 'product_name', 'size'], dtype=object)
+    batch['first_sale'] = pd.to_datetime(batch['asin'].map(first_sales))
+    batch = batch[batch['first_sale'].notna()]
+    batch['total_inv'] = (
+        batch['asin'].map(fba_totals).fillna(0).astype(np.int64) +
+        batch['asin'].map(awd_totals).fillna(0).astype(np.int64)
+    )
+    batch['fba_avail'] = batch['asin'].map(fba_available).fillna(0).astype(np.int64)
+    batch['age_months'] = (pd.Timestamp(today) - batch['first_sale']).dt.days / 30.44
+    batch['algorithm'] = np.select(
+        [batch['age_months'] >= 18, batch['age_months'] >= 6],
+        ['18m+', '6-18m'],
+        default='0-6m'
+    )
+    
+    # Uncached products run the algorithms unless the same inputs were
+    # calculated before - products whose data didn't change come from the memo
+    precomputed = {}
+    jobs = {}
+    uncached = batch[~batch['asin'].isin(list(cache_by_asin))]
+    shared_digest = hashlib.blake2b(
+        orjson.dumps([today, custom_settings, seasonality_data], option=orjson.OPT_SORT_KEYS)
+    ).digest()
+    for asin, algorithm, total_inv, fba_avail in zip(
+        *(uncached[c].tolist() for c in ['asin', 'algorithm', 'total_inv', 'fba_avail'])
+    ):
+        units_data = sales_by_asin.get(asin, [])
+        if len(units_data) >= 4:
+            job = (algorithm, units_data, vine_claims_by_asin.get(asin, []),
+                   product_sv_by_asin.get(asin, []), total_inv, fba_avail)
+            key = _tps_result_key(job, shared_digest)
+            summary = _lru_get(_TPS_RESULT_CACHE, key)
+            if summary is not None:
+                precomputed[asin] = (summary, None)
+            else:
+                jobs[asin] = (key, job)
+    
+    # The rest is pure-Python math the GIL would serialize, so enough of it
+    # goes to the worker's shared process pool (where enabled) up front
+    executor = get_process_pool() if len(jobs) >= PARALLEL_MIN_BATCH else None
+    if executor is not None:
+        workers = min(len(jobs), process_pool_workers())
+        per_task = max(1, len(jobs) // (workers * 4))
+        shared = (seasonality_data, today, custom_settings)
+        try:
+            outcomes = executor.map(_run_tps_task, [job for _, job in jobs.values()],
+                                    itertools.repeat(shared), chunksize=per_task)
+            for (asin, (key, _)), (result, error) in zip(jobs.items(), outcomes):
+                if error is None:
+                    _lru_put(_TPS_RESULT_CACHE, key, result, _TPS_RESULT_CACHE_SIZE)
+                precomputed[asin] = (result, error)
+        except BrokenProcessPool:
+            # A worker died - products without a result are calculated in-process below
+            discard_process_pool(executor)
+    
+    # Cached rows (calibrated values for accuracy) skip the algorithms
+    cached_rows = [cache_by_asin.get(asin) for asin in batch['asin'].tolist()]
+    
+    def calculate_single(asin, brand, product_name, size, total_inv, fba_avail, age_months, algorithm, cached):
         try:
-            product = products.get(asin)
-            if not product:
-                return None
-            
-            first_sale = first_sales.get(asin)
-            if not first_sale:
-                return None
-            
-            # Get inventory
-            total_inv = int(fba_totals.get(asin, 0) or 0) + int(awd_totals.get(asin, 0) or 0)
-            fba_avail = int(fba_available.get(asin, 0) or 0)
-            
-            # Calculate age
-            age_days = (today - first_sale).days
-            age_months = age_days / 30.44
-            
-            # Check cache first (calibrated values for accuracy)
-            cached = cache_by_asin.get(asin)
             if cached:
-                return {
-                    'brand': product.brand or 'TPS Plant Foods',
-                    'product': product.product_name,
-                    'product_name': product.product_name,
-                    'size': product.size,
-                    'asin': asin,
-                    'units_to_make': cached.units_to_make,
-                    'doi_total_days': round(cached.doi_total_days or 0, 0),
-                    'doi_fba_days': round(cached.doi_fba_available_days or 0, 0),
-                    'doi_total': round(cached.doi_total_days or 0, 0),
-                    'doi_fba': round(cached.doi_fba_available_days or 0, 0),
-                    'total_inventory': total_inv,
-                    'fba_available': fba_avail,
-                    'label_inventory': label_inv_by_asin.get(asin, 0),
-                    'algorithm': cached.algorithm,
-                    'age_months': round(age_months, 1),
-                    'needs_seasonality': False
-                }
-            
-            # Fallback: Calculate if not in cache
-            units_data = sales_by_asin.get(asin, [])
-            if len(units_data) < 4:
-                return None
-            
-            # Get vine claims for this ASIN
-            vine_claims = vine_claims_by_asin.get(asin, [])
-            
-            # Get per-product search volume for this ASIN
-            product_sv = product_sv_by_asin.get(asin, [])
-            
-            # Settings - use custom settings from request params
-            settings = custom_settings.copy()
-            settings['total_inventory'] = total_inv
-            settings['fba_available'] = fba_avail
-            
-            algorithm = "18m+" if age_months >= 18 else ("6-18m" if age_months >= 6 else "0-6m")
-            
-            # Run appropriate algorithm based on product age
-            if algorithm == "18m+":
-                result = tps_18m(units_data, today, settings)
-            elif algorithm == "6-18m":
-                result = tps_6_18m(units_data, seasonality_data, today, settings, vine_claims, product_sv)
-            else:  # 0-6m
-                result = tps_0_6m(units_data, seasonality_data, vine_claims, today, settings, product_sv)
+                units_to_make = cached.units_to_make
+                doi_total_days = round(cached.doi_total_days or 0, 0)
+                doi_fba_days = round(cached.doi_fba_available_days or 0, 0)
+                algorithm_used = cached.algorithm
+                needs_seasonality = False
+            else:
+                # Fallback: Calculate if not in cache
+                if asin in precomputed:
+                    result, error = precomputed[asin]
+                    if error is not None:
+                        raise error
+                elif asin in jobs:
+                    # Run appropriate algorithm based on product age, with this
+                    # ASIN's vine claims and per-product search volume
+                    key, job = jobs[asin]
+                    result = _tps_summary(_run_tps(*job, seasonality_data, today, custom_settings))
+                    _lru_put(_TPS_RESULT_CACHE, key, result, _TPS_RESULT_CACHE_SIZE)
+                else:
+                    return None  # fewer than 4 weeks of sales
+                
+                units_to_make = result['units_to_make']
+                doi_total_days = round(result['doi_total_days'], 0)
+                doi_fba_days = round(result['doi_fba_days'], 0)
+                algorithm_used = algorithm
+                needs_seasonality = result.get('needs_seasonality', False)
             
-            return {
-                'brand': product.brand or 'TPS Plant Foods',
-                'product': product.product_name,
-                'product_name': product.product_name,
-                'size': product.size,
+            row = {
+                'brand': brand or 'TPS Plant Foods',
+                'product_name': product_name,
+                'size': size,
                 'asin': asin,
-                'units_to_make': result['units_to_make'],
-                'doi_total_days': round(result['doi_total_days'], 0),
-                'doi_fba_days': round(result['doi_fba_days'], 0),
-                'doi_total': round(result['doi_total_days'], 0),
-                'doi_fba': round(result['doi_fba_days'], 0),
+                'units_to_make': units_to_make,
+                'doi_total_days': doi_total_days,
+                'doi_fba_days': doi_fba_days,
                 'total_inventory': total_inv,
                 'fba_available': fba_avail,
                 'label_inventory': label_inv_by_asin.get(asin, 0),
-                'algorithm': algorithm,
+                'algorithm': algorithm_used,
                 'age_months': round(age_months, 1),
-                'needs_seasonality': result.get('needs_seasonality', False)
+                'needs_seasonality': needs_seasonality
             }
-        except:
+            if not compact:
+                # Legacy aliases of product_name and the doi_*_days fields
+                row['product'] = product_name
+                row['doi_total'] = doi_total_days
+                row['doi_fba'] = doi_fba_days
+            return row
+        except _FORECAST_DATA_ERRORS as e:
+            # Data problems drop the ASIN but are counted; anything else propagates
+            failures[type(e).__name__] += 1
+            if failures[type(e).__name__] == 1:
+                current_app.logger.warning("forecast failed for %s", asin, exc_info=True)
             return None
     
-    # Run calculations in parallel (8 threads)
-    forecasts = []
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {executor.submit(calculate_single, asin): asin for asin in products.keys()}
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                forecasts.append(result)
+    failures = Counter()
+    
+    # Cached rows are dict lookups and uncached ones were calculated above (or
+    # are too few to be worth a pool), so a plain pass over the columns suffices
+    columns = ['asin', 'brand', 'product_name', 'size', 'total_inv', 'fba_avail', 'age_months', 'algorithm']
+    records = (
+        result for result in (
+            calculate_single(*row) for row in zip(
+                *(batch[c].tolist() for c in columns), cached_rows
+            )
+        ) if result
+    )
+    
+    if stream and request.args.get('sorted') == 'false':
+        return Response(
+            stream_with_context(orjson.dumps(r, option=orjson.OPT_SORT_KEYS) + b'\n' for r in records),
+            mimetype='application/x-ndjson'
+        )
+    
+    forecasts = list(records)
     
     calc_time = time.time() - start_time - load_time
     
@@ -442,18 +1027,26 @@ def get_all_forecasts():
         'doi': 'doi_total_days',
         'fba': 'doi_fba_days',
         'units': 'units_to_make',
-        'product': 'product'
+        'product': 'product_name'
     }.get(sort_by, 'doi_total_days')
     
     reverse = (order == 'desc')
-    forecasts.sort(key=lambda x: (x.get(sort_key) or 0) if sort_key != 'product' else (x.get(sort_key) or ''), reverse=reverse)
+    forecasts = _sort_rows(forecasts, sort_key, reverse, text=(sort_key == 'product_name'))
+    
+    if stream:
+        return Response(
+            (orjson.dumps(r, option=orjson.OPT_SORT_KEYS) + b'\n' for r in forecasts),
+            mimetype='application/x-ndjson'
+        )
+    
+    # Both keys carry the same rows - serialize them once and embed the bytes twice
+    rows = orjson.Fragment(orjson.dumps(forecasts, option=orjson.OPT_SORT_KEYS))
     
     total_time = time.time() - start_time
     
-    return jsonify({
+    payload = {
         'success': True,
-        'products': forecasts,  # Frontend expects 'products' not 'forecasts'
-        'forecasts': forecasts,  # Keep for backwards compatibility
+        'products': rows,  # Frontend expects 'products' not 'forecasts'
         'count': len(forecasts),
         'total': len(forecasts),
         'sort': {'field': sort_by, 'order': order},
@@ -467,8 +1060,29 @@ def get_all_forecasts():
         'performance': {
             'data_load_seconds': round(load_time, 2),
             'calculation_seconds': round(calc_time, 2),
-            'total_seconds': round(total_time, 2)
+            'total_seconds': round(total_time, 2),
+            'failures': dict(failures)
         }
+    }
+    if not compact:
+        payload['forecasts'] = rows  # Keep for backwards compatibility
+    
+    return Response(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), mimetype='application/json')
+
+
+@api_bp.route('/forecast/cache/clear', methods=['POST'])
+def clear_forecast_response_caches():
+    """Drop the in-process /forecast/all and /forecast/<asin> response caches and seasonality rows."""
+    
+    with _RESPONSE_CACHE_LOCK:
+        cleared = len(_FORECAST_ALL_CACHE) + len(_FORECAST_DATA_CACHE)
+        _FORECAST_ALL_CACHE.clear()
+        _FORECAST_DATA_CACHE.clear()
+    forecast_service.invalidate_seasonality()
+    
+    return jsonify({
+        'message': 'Forecast response caches cleared',
+        'entries_cleared': cleared
     })
 
 
@@ -481,21 +1095,174 @@ def refresh_forecast_cache():
     Should be called periodically (e.g., daily) or after data updates.
     
     Note: This can take 1-2 minutes for 1000 products.
-    """
-    from app.services.cache_service import cache_service
     
-    stats = cache_service.refresh_all_forecasts()
+    Query params:
+        - background: 'true' runs the refresh in a background thread and returns
+          202 Accepted at once; poll GET /forecast/refresh/status for the outcome
+    """
+    if request.args.get('background') == 'true':
+        with _REFRESH_JOB_LOCK:
+            running = _REFRESH_JOB['thread'] is not None and _REFRESH_JOB['thread'].is_alive()
+            if not running:
+                thread = threading.Thread(
+                    target=_run_background_refresh,
+                    args=(current_app._get_current_object(),),
+                    daemon=True
+                )
+                _REFRESH_JOB.update(thread=thread, started_at=datetime.utcnow(),
+                                    finished_at=None, stats=None, error=None)
+                thread.start()
+            status = _refresh_status()
+        
+        return jsonify({
+            'message': 'Cache refresh already running' if running else 'Cache refresh started',
+            **status
+        }), 202
     
     return jsonify({
         'message': 'Cache refresh complete',
-        'stats': stats
+        'stats': _refresh_forecasts()
     })
 
 
+@api_bp.route('/forecast/refresh/status', methods=['GET'])
+def get_refresh_status():
+    """
+    State of this worker's background refresh, plus when forecast_cache was last written.
+    
+    With several gunicorn workers the POST may have started the refresh in
+    another one; last_computed_at comes from the database and is the same
+    everywhere.
+    """
+    with _REFRESH_JOB_LOCK:
+        status = _refresh_status()
+    status['last_computed_at'] = db.session.query(func.max(ForecastCache.computed_at)).scalar()
+    return jsonify(status)
+
+
+def _refresh_forecasts():
+    """Recalculate every forecast_cache row and drop the responses built from the old ones."""
+    stats = cache_service.refresh_all_forecasts()
+    # Every cached response was built from the old forecast_cache rows
+    with _RESPONSE_CACHE_LOCK:
+        _FORECAST_ALL_CACHE.clear()
+        _FORECAST_DATA_CACHE.clear()
+    return stats
+
+
+def _run_background_refresh(app):
+    """Thread target for ?background=true - records the outcome in _REFRESH_JOB."""
+    with app.app_context():
+        try:
+            stats, error = _refresh_forecasts(), None
+        except Exception as e:
+            app.logger.exception("background forecast refresh failed")
+            stats, error = None, str(e)
+    
+    with _REFRESH_JOB_LOCK:
+        _REFRESH_JOB.update(finished_at=datetime.utcnow(), stats=stats, error=error)
+
+
+def _refresh_status():
+    """Snapshot of _REFRESH_JOB for a response (caller holds _REFRESH_JOB_LOCK)."""
+    job = _REFRESH_JOB
+    if job['started_at'] is None:
+        state = 'idle'
+    elif job['finished_at'] is None:
+        state = 'running'
+    else:
+        state = 'failed' if job['error'] else 'completed'
+    return {
+        'status': state,
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'stats': job['stats'],
+        'error': job['error'],
+    }
+
+
 # =====================================================
 # DYNAMIC FORECAST ROUTES (with <asin> parameter)
 # =====================================================
 
+def _forecast_data_version(asin):
+    """
+    Fingerprint every input behind one /forecast/<asin> response.
+    
+    One round-trip: a single one-row aggregate per table - the product,
+    sales, inventory, label, vine, search volume and cached forecast rows of
+    the ASIN (asin-leading indexes) plus the 52-row seasonality table -
+    cross-joined ON true, so each index range is read once. label_inventory
+    is optional (the routes load labels best-effort), so without the table
+    the version is taken from the other aggregates.
+    """
+    aggregates = [
+        select(func.count(), func.max(Product.product_name), func.max(Product.size),
+               func.max(Product.brand)).where(Product.asin == asin),
+        select(func.count(), func.max(UnitsSold.week_date),
+               func.sum(UnitsSold.units)).where(UnitsSold.asin == asin),
+        select(func.sum(FBAInventory.available), func.sum(FBAInventory.inbound_quantity),
+               func.sum(FBAInventory.total_reserved_quantity)).where(FBAInventory.asin == asin),
+        select(func.sum(AWDInventory.available_in_awd_units), func.sum(AWDInventory.reserved_in_awd_units),
+               func.sum(AWDInventory.inbound_to_awd_units),
+               func.sum(AWDInventory.outbound_to_fba_units)).where(AWDInventory.asin == asin),
+        select(func.count(), func.max(VineClaims.claim_date),
+               func.sum(VineClaims.units_claimed)).where(VineClaims.asin == asin),
+        select(func.count(), func.max(ProductSearchVolume.week_date),
+               func.sum(ProductSearchVolume.search_volume)).where(ProductSearchVolume.asin == asin),
+        select(func.max(ForecastCache.computed_at)).where(ForecastCache.asin == asin),
+        select(func.count(), func.sum(Seasonality.seasonality_index), func.sum(Seasonality.sv_smooth_env_97)),
+    ]
+    label = select(func.max(LabelInventory.label_inventory)).where(LabelInventory.asin == asin)
+    
+    def version(queries):
+        subqueries = [query.subquery() for query in queries]
+        joined = subqueries[0]
+        for subquery in subqueries[1:]:
+            joined = joined.join(subquery, true())
+        return select(*(column for subquery in subqueries for column in subquery.c)).select_from(joined)
+    
+    return tuple(_execute_optional(version([*aggregates, label]), version(aggregates))[0])
+
+
+def _memoized_forecast(asin, params, build):
+    """
+    Serve a /forecast/<asin>/... route from _FORECAST_DATA_CACHE.
+    
+    The key is the endpoint, ASIN, today's date, the current
+    _FORECAST_DATA_CACHE_TTL_SECONDS window, the data version and the route's
+    normalized `params`; the response carries an ETag of the same key, so a
+    matching If-None-Match gets 304. On a miss build(asin) runs and a 200
+    body is stored as JSON bytes - hits skip the queries and the encoding.
+    
+    The data version sums and counts rows, so a correction that keeps those
+    aggregates (units moved between weeks, say) doesn't change it; the TTL
+    window bounds how long such an edit is served stale. Windows are wall-clock
+    aligned, so every worker process agrees on the ETag.
+    
+    Before a miss builds, the ASIN's product row and the seasonality rows are
+    re-read into forecast_service's per-process caches, so the body stored
+    under the key comes from the same data the key was taken from.
+    """
+    window = int(time.time() // _FORECAST_DATA_CACHE_TTL_SECONDS)
+    cache_key = (request.endpoint, asin, date.today(), window, _forecast_data_version(asin), params)
+    etag = hashlib.blake2b(repr(cache_key).encode(), digest_size=16).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        return _revalidated(etag)
+    
+    body = _lru_get(_FORECAST_DATA_CACHE, cache_key)
+    if body is None:
+        forecast_service.refresh_products([asin])
+        forecast_service.get_seasonality_data(ttl=0)
+        response = current_app.make_response(build(asin))
+        if response.status_code != 200:
+            return response
+        body = response.get_data()
+        _lru_put(_FORECAST_DATA_CACHE, cache_key, body, _FORECAST_DATA_CACHE_SIZE)
+    
+    return _with_etag(Response(body, mimetype='application/json'), etag)
+
+
 @api_bp.route('/forecast/<asin>', methods=['GET'])
 def get_forecast_data(asin):
     """
@@ -513,25 +1280,39 @@ def get_forecast_data(asin):
         - Product Age (days, weeks, months, years)
         - Global Settings used
     """
-    from app.services.forecast_service import forecast_service
-    from app.algorithms.algorithms_tps import (
-        calculate_forecast_18m_plus as tps_18m,
-        calculate_forecast_6_18m as tps_6_18m,
-        calculate_forecast_0_6m_exact as tps_0_6m,
-        DEFAULT_SETTINGS
-    )
-    from datetime import date
-    
-    # Get product info
-    product = Product.query.filter_by(asin=asin).first()
+    return _memoized_forecast(asin, (
+        request.args.get('amazon_doi_goal', type=int),
+        request.args.get('inbound_lead_time', type=int),
+        request.args.get('manufacture_lead_time', type=int)
+    ), _build_forecast_data)
+
+
+def _build_forecast_data(asin):
+    # Product info, first sale (product age), inventory levels (aggregated
+    # across SKUs) and label inventory in one round-trip
+    fba, awd = forecast_service.inventory_sums(asin)
+    product = db.session.execute(
+        select(
+            Product.product_name,
+            Product.size,
+            select(func.min(UnitsSold.week_date))
+            .where(UnitsSold.asin == asin, UnitsSold.units > 0)
+            .scalar_subquery().label('first_sale'),
+            fba, awd,
+            LabelInventory.asin.label('label_asin'),
+            LabelInventory.label_inventory
+        )
+        .select_from(Product)
+        .join(fba, true())
+        .join(awd, true())
+        .outerjoin(LabelInventory, LabelInventory.asin == Product.asin)
+        .where(Product.asin == asin)
+        .limit(1)
+    ).first()
     if not product:
         return jsonify({'error': f'Product not found: {asin}'}), 404
     
-    # Get product age
-    first_sale = db.session.query(func.min(UnitsSold.week_date)).filter(
-        UnitsSold.asin == asin, UnitsSold.units > 0
-    ).scalar()
-    
+    first_sale = product.first_sale
     if not first_sale:
         return jsonify({'error': 'No sales history for product'}), 404
     
@@ -549,18 +1330,11 @@ def get_forecast_data(asin):
     else:
         algorithm = "0-6m"
     
-    # Get sales data
-    sales = UnitsSold.query.filter_by(asin=asin).order_by(UnitsSold.week_date).all()
-    units_data = [{'week_end': s.week_date, 'units': s.units} for s in sales]
-    
-    # Get inventory levels (aggregated across SKUs)
-    inventory = forecast_service.get_inventory_levels(asin)
+    inventory = forecast_service.inventory_levels(product)
     total_inventory = inventory.total_inventory
     fba_available = inventory.fba_available
     
-    # Get label inventory
-    label_record = LabelInventory.query.filter_by(asin=asin).first()
-    label_inventory = label_record.label_inventory if label_record else 0
+    label_inventory = product.label_inventory if product.label_asin is not None else 0
     
     # Get custom DOI settings from query parameters (or use defaults)
     custom_amazon_doi_goal = request.args.get('amazon_doi_goal', type=int)
@@ -587,16 +1361,13 @@ def get_forecast_data(asin):
         settings['manufacture_lead_time']
     )
     
-    # Get vine claims for this ASIN
-    vine_claims_records = VineClaims.query.filter_by(asin=asin).all()
-    vine_claims = [{'claim_date': vc.claim_date, 'units_claimed': vc.units_claimed} for vc in vine_claims_records]
-    
-    # Get per-product search volume for this ASIN
-    product_sv_records = ProductSearchVolume.query.filter_by(asin=asin).all()
-    product_sv = [{'week_date': sv.week_date, 'search_volume': sv.search_volume} for sv in product_sv_records]
-    
     # Try to get from cache first (calibrated values)
-    cached = ForecastCache.query.filter_by(asin=asin).first()
+    cached = db.session.execute(
+        select(
+            ForecastCache.units_to_make, ForecastCache.doi_total_days, ForecastCache.doi_fba_available_days,
+            ForecastCache.sales_velocity_adjustment, ForecastCache.algorithm
+        ).where(ForecastCache.asin == asin).limit(1)
+    ).first()
     if cached:
         # Use cached values (already calibrated for accuracy)
         units_to_make = cached.units_to_make
@@ -606,7 +1377,30 @@ def get_forecast_data(asin):
         algorithm = cached.algorithm  # Use cached algorithm
         result = {'needs_seasonality': False}
     else:
-        # Fallback: Run the appropriate algorithm
+        # Fallback: Run the appropriate algorithm - only now are the raw inputs needed
+        sales = db.session.execute(
+            select(UnitsSold.week_date, UnitsSold.units)
+            .where(UnitsSold.asin == asin)
+            .order_by(UnitsSold.week_date)
+        ).all()
+        units_data = [{'week_end': week_date, 'units': units} for week_date, units in sales]
+        
+        if algorithm != "18m+":
+            # Vine claims and per-product search volume feed the 6-18m and 0-6m algorithms
+            vine_claims = [
+                {'claim_date': claim_date, 'units_claimed': units_claimed}
+                for claim_date, units_claimed in db.session.execute(
+                    select(VineClaims.claim_date, VineClaims.units_claimed).where(VineClaims.asin == asin)
+                )
+            ]
+            product_sv = [
+                {'week_date': week_date, 'search_volume': search_volume}
+                for week_date, search_volume in db.session.execute(
+                    select(ProductSearchVolume.week_date, ProductSearchVolume.search_volume)
+                    .where(ProductSearchVolume.asin == asin)
+                )
+            ]
+        
         if algorithm == "18m+":
             result = tps_18m(units_data, today, settings)
             units_to_make = result['units_to_make']
@@ -614,31 +1408,29 @@ def get_forecast_data(asin):
             doi_fba = result['doi_fba_days']
             velocity_adj = result.get('sales_velocity_adjustment', 0)
         elif algorithm == "6-18m":
-            # Get seasonality data from database (include sv_smooth_env_97 for forecast calculation)
-            from app.models import Seasonality
-            seasonality = Seasonality.query.all()
-            seasonality_data = [{
-                'week_of_year': s.week_of_year, 
-                'seasonality_index': s.seasonality_index,
-                'sv_smooth_env_97': s.sv_smooth_env_97
-            } for s in seasonality]
+            # Seasonality data (include sv_smooth_env_97 for forecast calculation)
+            seasonality_data = forecast_service.get_seasonality_data()
             result = tps_6_18m(units_data, seasonality_data, today, settings, vine_claims, product_sv)
             units_to_make = result['units_to_make']
             doi_total = result['doi_total_days']
             doi_fba = result['doi_fba_days']
             velocity_adj = 0
         else:  # 0-6m
-            from app.models import Seasonality
-            seasonality = Seasonality.query.all()
-            seasonality_data = [{'week_of_year': s.week_of_year, 'seasonality_index': s.seasonality_index} for s in seasonality]
+            seasonality_data = forecast_service.get_seasonality_data()
             result = tps_0_6m(units_data, seasonality_data, vine_claims, today, settings, product_sv)  # Include product_sv!
             units_to_make = result['units_to_make']
             doi_total = result['doi_total_days']
             doi_fba = result['doi_fba_days']
             velocity_adj = 0
     
+    # DOI goal and lead times, read once for the global_settings block
+    amazon_doi_goal = settings.get('amazon_doi_goal', 93)
+    total_lead_time = settings.get('inbound_lead_time', 30) + settings.get('manufacture_lead_time', 7)
+    total_doi_goal = amazon_doi_goal + total_lead_time
+    is_18m_plus = algorithm == "18m+"
+    
     # Build response matching Excel Settings page
-    return jsonify({
+    payload = {
         'product_info': {
             'child_asin': asin,
             'product': product.product_name,
@@ -664,25 +1456,27 @@ def get_forecast_data(asin):
             'needs_seasonality': result.get('needs_seasonality', False)
         },
         'product_age': {
-            'days': round(age_days, 0),
+            'days': age_days,  # already a whole number of days
             'weeks': round(age_weeks, 0),
             'months': round(age_months, 1),
             'years': round(age_years, 1)
         },
         'global_settings': {
-            'amazon_doi_goal': settings.get('amazon_doi_goal', 93),
+            'amazon_doi_goal': amazon_doi_goal,
             'inbound_lead_time': settings.get('inbound_lead_time', 30),
             'manufacture_lead_time': settings.get('manufacture_lead_time', 7),
-            'total_lead_time_days': settings.get('inbound_lead_time', 30) + settings.get('manufacture_lead_time', 7),
-            'total_doi_days_goal': settings.get('amazon_doi_goal', 93) + settings.get('inbound_lead_time', 30) + settings.get('manufacture_lead_time', 7),
-            'total_doi_weeks_goal': round((settings.get('amazon_doi_goal', 93) + settings.get('inbound_lead_time', 30) + settings.get('manufacture_lead_time', 7)) / 7, 1)
+            'total_lead_time_days': total_lead_time,
+            'total_doi_days_goal': total_doi_goal,
+            'total_doi_weeks_goal': round(total_doi_goal / 7, 1)
         },
         'algorithm_settings': {
-            'market_adjustment': f"{settings.get('market_adjustment', 0.05) * 100:.2f}%",
-            'sales_velocity_adjustment': f"{velocity_adj * 100:.2f}%" if algorithm == "18m+" else "N/A",
-            'sales_velocity_adjustment_weight': f"{settings.get('velocity_weight', 0.15) * 100:.0f}%" if algorithm == "18m+" else "N/A"
+            'market_adjustment': f"{settings.get('market_adjustment', 0.05):.2%}",
+            'sales_velocity_adjustment': f"{velocity_adj:.2%}" if is_18m_plus else "N/A",
+            'sales_velocity_adjustment_weight': f"{settings.get('velocity_weight', 0.15):.0%}" if is_18m_plus else "N/A"
         }
-    })
+    }
+    
+    return jsonify(payload)
 
 
 @api_bp.route('/forecast/<asin>/calculate', methods=['GET', 'POST'])
@@ -698,9 +1492,6 @@ def calculate_forecast(asin):
         - sales_velocity_adj_weight: Weight of velocity adjustment (default: 0.15 = 15%)
         - force_algorithm: Force specific algorithm ('18m+', '6-18m', '0-6m')
     """
-    from app.services.forecast_service import forecast_service
-    from app.algorithms.forecast_18m_plus import ForecastSettings
-    
     # Get parameters from request
     if request.method == 'POST':
         data = request.get_json() or {}
@@ -708,20 +1499,15 @@ def calculate_forecast(asin):
         data = request.args.to_dict()
     
     # Build settings
-    settings = ForecastSettings(
-        amazon_doi_goal=int(data.get('amazon_doi_goal', 93)),
-        inbound_lead_time=int(data.get('inbound_lead_time', 30)),
-        manufacture_lead_time=int(data.get('manufacture_lead_time', 7)),
-        market_adjustment=float(data.get('market_adjustment', 0.05)),
-        sales_velocity_adj_weight=float(data.get('sales_velocity_adj_weight', 0.15))
-    )
+    settings = _forecast_settings(data)
     
     force_algorithm = data.get('force_algorithm')
     
     # Run forecast
-    result = forecast_service.run_forecast(asin, settings, force_algorithm)
-    
-    return jsonify(result)
+    return _memoized_forecast(
+        asin, (astuple(settings), force_algorithm),
+        lambda asin: jsonify(forecast_service.run_forecast(asin, settings, force_algorithm))
+    )
 
 
 @api_bp.route('/forecast/<asin>/details', methods=['GET', 'POST'])
@@ -731,9 +1517,6 @@ def get_forecast_details(asin):
     
     Returns the full forecast dataframe for visualization/analysis.
     """
-    from app.services.forecast_service import forecast_service
-    from app.algorithms.forecast_18m_plus import ForecastSettings
-    
     # Get parameters
     if request.method == 'POST':
         data = request.get_json() or {}
@@ -741,13 +1524,7 @@ def get_forecast_details(asin):
         data = request.args.to_dict()
     
     # Build settings
-    settings = ForecastSettings(
-        amazon_doi_goal=int(data.get('amazon_doi_goal', 93)),
-        inbound_lead_time=int(data.get('inbound_lead_time', 30)),
-        manufacture_lead_time=int(data.get('manufacture_lead_time', 7)),
-        market_adjustment=float(data.get('market_adjustment', 0.05)),
-        sales_velocity_adj_weight=float(data.get('sales_velocity_adj_weight', 0.15))
-    )
+    settings = _forecast_settings(data)
     
     result = forecast_service.get_forecast_details(asin, settings)
     
@@ -764,10 +1541,9 @@ def batch_forecast():
             "asins": ["ASIN1", "ASIN2", ...],
             "settings": { ... optional settings ... }
         }
-    """
-    from app.services.forecast_service import forecast_service
-    from app.algorithms.forecast_18m_plus import ForecastSettings
     
+    The response is streamed as each chunk of ASINs finishes.
+    """
     data = request.get_json() or {}
     asins = data.get('asins', [])
     settings_data = data.get('settings', {})
@@ -776,23 +1552,16 @@ def batch_forecast():
         return jsonify({'error': 'No ASINs provided'}), 400
     
     # Build settings
-    settings = ForecastSettings(
-        amazon_doi_goal=int(settings_data.get('amazon_doi_goal', 93)),
-        inbound_lead_time=int(settings_data.get('inbound_lead_time', 30)),
-        manufacture_lead_time=int(settings_data.get('manufacture_lead_time', 7)),
-        market_adjustment=float(settings_data.get('market_adjustment', 0.05)),
-        sales_velocity_adj_weight=float(settings_data.get('sales_velocity_adj_weight', 0.15))
-    )
+    settings = _forecast_settings(settings_data)
     
-    results = []
-    for asin in asins:
-        result = forecast_service.run_forecast(asin, settings)
-        results.append(result)
+    def generate():
+        # Results go out one bulk chunk at a time instead of one document at the end
+        yield '{"results":['
+        for i, result in enumerate(forecast_service.iter_forecast_bulk(asins, settings)):
+            yield ('' if i == 0 else ',') + current_app.json.dumps(result)
+        yield f'],"total":{len(asins)}}}\n'
     
-    return jsonify({
-        'total': len(results),
-        'results': results
-    })
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 
 @api_bp.route('/forecast/<asin>/chart', methods=['GET'])
@@ -810,19 +1579,14 @@ def get_forecast_chart(asin):
         - Historical data with smoothed values
         - Forecast data with adjusted values
     """
-    from app.algorithms.algorithms_tps import (
-        calculate_forecast_18m_plus as tps_18m,
-        calculate_forecast_6_18m as tps_6_18m,
-        calculate_forecast_0_6m_exact as tps_0_6m,
-        DEFAULT_SETTINGS
-    )
-    from app.models import Seasonality, VineClaims
-    from datetime import date, timedelta, datetime
-    
+    return _memoized_forecast(asin, (), _build_forecast_chart)
+
+
+def _build_forecast_chart(asin):
     today = date.today()
     
     # Get product info
-    product = Product.query.filter_by(asin=asin).first()
+    product = forecast_service.get_product(asin)
     if not product:
         return jsonify({'error': f'Product not found: {asin}'}), 404
     
@@ -846,47 +1610,50 @@ def get_forecast_chart(asin):
         algorithm = "0-6m"
     
     # Get seasonality data (for 6-18m and 0-6m)
-    seasonality = Seasonality.query.all()
-    seasonality_data = [{
-        'week_of_year': s.week_of_year, 
-        'seasonality_index': s.seasonality_index,
-        'sv_smooth_env_97': s.sv_smooth_env_97
-    } for s in seasonality]
+    seasonality_data = forecast_service.get_seasonality_data()
     
     # Get vine claims
-    vine_records = VineClaims.query.filter_by(asin=asin).all()
-    vine_claims = [{'claim_date': v.claim_date, 'units_claimed': v.units_claimed} for v in vine_records]
+    vine_claims = [
+        {'claim_date': claim_date, 'units_claimed': units_claimed}
+        for claim_date, units_claimed in db.session.execute(
+            select(VineClaims.claim_date, VineClaims.units_claimed).where(VineClaims.asin == asin)
+        )
+    ]
     
     # Get per-product search volume
-    product_sv_records = ProductSearchVolume.query.filter_by(asin=asin).all()
-    product_sv = [{'week_date': sv.week_date, 'search_volume': sv.search_volume} for sv in product_sv_records]
+    product_sv = [
+        {'week_date': week_date, 'search_volume': search_volume}
+        for week_date, search_volume in db.session.execute(
+            select(ProductSearchVolume.week_date, ProductSearchVolume.search_volume)
+            .where(ProductSearchVolume.asin == asin)
+        )
+    ]
     
     # Get sales data
-    sales = UnitsSold.query.filter_by(asin=asin).order_by(UnitsSold.week_date).all()
-    units_data = [{'week_end': s.week_date, 'units': s.units} for s in sales]
-    
-    # Get FBA inventory (detailed)
-    fba_records = FBAInventory.query.filter_by(asin=asin).all()
-    fba_total = sum(f.available or 0 for f in fba_records) + \
-                sum(f.inbound_quantity or 0 for f in fba_records) + \
-                sum(f.total_reserved_quantity or 0 for f in fba_records)
-    fba_available = sum(f.available or 0 for f in fba_records)
-    fba_reserved = sum(f.total_reserved_quantity or 0 for f in fba_records)
-    fba_inbound = sum(f.inbound_quantity or 0 for f in fba_records)
-    
-    # Get AWD inventory (detailed)
-    awd_records = AWDInventory.query.filter_by(asin=asin).all()
-    awd_total = sum(a.available_in_awd_units or 0 for a in awd_records) + \
-                sum(a.inbound_to_awd_units or 0 for a in awd_records) + \
-                sum(a.reserved_in_awd_units or 0 for a in awd_records) + \
-                sum(a.outbound_to_fba_units or 0 for a in awd_records)
-    awd_available = sum(a.available_in_awd_units or 0 for a in awd_records)
-    awd_outbound = sum(a.outbound_to_fba_units or 0 for a in awd_records)
-    awd_reserved = sum(a.reserved_in_awd_units or 0 for a in awd_records)
+    sales = db.session.execute(
+        select(UnitsSold.week_date, UnitsSold.units)
+        .where(UnitsSold.asin == asin)
+        .order_by(UnitsSold.week_date)
+    ).all()
+    units_data = [{'week_end': week_date, 'units': units} for week_date, units in sales]
+    
+    # Get FBA + AWD inventory (summed across SKUs in SQL)
+    inventory = forecast_service.get_inventory_levels(asin)
+    fba_available = inventory.fba_available
+    fba_reserved = inventory.fba_reserved
+    fba_inbound = inventory.fba_inbound
+    fba_total = fba_available + fba_inbound + fba_reserved
+    awd_available = inventory.awd_available
+    awd_outbound = inventory.awd_outbound_to_fba
+    awd_reserved = inventory.awd_reserved
+    awd_total = awd_available + inventory.awd_inbound + awd_reserved + awd_outbound
     
     # Get label inventory (with error handling in case table doesn't exist)
     try:
-        label = LabelInventory.query.filter_by(asin=asin).first()
+        label = db.session.execute(
+            select(LabelInventory.label_inventory, LabelInventory.label_id, LabelInventory.label_status)
+            .where(LabelInventory.asin == asin)
+        ).first()
         label_inventory = label.label_inventory if label else 0
         label_id = label.label_id if label else None
         label_status = label.label_status if label else None
@@ -1064,7 +1831,7 @@ def get_forecast_chart(asin):
             if isinstance(last_week_end, str):
                 try:
                     last_forecast_date = date.fromisoformat(last_week_end)
-                except:
+                except ValueError:
                     last_forecast_date = last_date
             elif hasattr(last_week_end, 'isoformat'):
                 last_forecast_date = last_week_end
@@ -1184,8 +1951,6 @@ def calculate_forecast_tps(asin):
         - sales_velocity_adjustment: Percentage as decimal (default: 0.10)
         - velocity_weight: Weight as decimal (default: 0.15)
     """
-    from app.services.forecast_service import forecast_service
-    
     # Get parameters from request
     if request.method == 'POST':
         data = request.get_json() or {}
@@ -1208,9 +1973,10 @@ def calculate_forecast_tps(asin):
         custom_settings['velocity_weight'] = float(data['velocity_weight'])
     
     # Run TPS forecast
-    result = forecast_service.run_forecast_tps(asin, custom_settings if custom_settings else None)
-    
-    return jsonify(result)
+    return _memoized_forecast(
+        asin, tuple(sorted(custom_settings.items())),
+        lambda asin: jsonify(forecast_service.run_forecast_tps(asin, custom_settings or None))
+    )
 
 
 # =====================================================
@@ -1230,16 +1996,7 @@ def get_label_inventory():
         sort_by = request.args.get('sort', 'inventory')
         order = request.args.get('order', 'asc')
         
-        labels = LabelInventory.query.all()
-        
-        results = [{
-            'asin': l.asin,
-            'product_name': l.product_name,
-            'size': l.size,
-            'label_id': l.label_id,
-            'label_status': l.label_status,
-            'label_inventory': l.label_inventory
-        } for l in labels]
+        results = [dict(row) for row in db.session.execute(select(*_LABEL_COLUMNS)).mappings()]
     except Exception as e:
         return jsonify({
             'error': f'Label inventory table not available: {str(e)}',
@@ -1255,12 +2012,12 @@ def get_label_inventory():
     }.get(sort_by, 'label_inventory')
     
     reverse = (order == 'desc')
-    results.sort(key=lambda x: (x.get(sort_key) or 0) if sort_key != 'product_name' else (x.get(sort_key) or ''), reverse=reverse)
+    results = _sort_rows(results, sort_key, reverse, text=(sort_key == 'product_name'))
     
     return jsonify({
         'labels': results,
         'total': len(results),
-        'total_labels_in_stock': sum(l.label_inventory for l in labels)
+        'total_labels_in_stock': sum(l['label_inventory'] for l in results)
     })
 
 
@@ -1277,15 +2034,6 @@ def get_labels_needed():
         - sort: Sort field - 'needed' (default), 'product', 'inventory'
         - order: 'desc' (default) or 'asc'
     """
-    from app.services.forecast_service import forecast_service
-    from app.algorithms.algorithms_tps import (
-        calculate_forecast_18m_plus as tps_18m,
-        DEFAULT_SETTINGS
-    )
-    from datetime import date
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    import time
-    
     start_time = time.time()
     
     sort_by = request.args.get('sort', 'needed')
@@ -1294,45 +2042,24 @@ def get_labels_needed():
     today = date.today()
     
     # Get all label inventory
-    labels = {l.asin: l for l in LabelInventory.query.all()}
+    labels = {l.asin: l for l in db.session.execute(select(*_LABEL_COLUMNS))}
     
     # Get all products that have labels
-    products = {p.asin: p for p in Product.query.filter(Product.asin.in_(labels.keys())).all()}
+    products = forecast_service.get_products(list(labels))
     
     # Bulk load forecast data (same as /forecast/all)
-    first_sales = dict(
-        db.session.query(
-            UnitsSold.asin,
-            func.min(UnitsSold.week_date)
-        ).filter(UnitsSold.units > 0).group_by(UnitsSold.asin).all()
-    )
-    
-    all_sales = db.session.query(
-        UnitsSold.asin, UnitsSold.week_date, UnitsSold.units
-    ).order_by(UnitsSold.asin, UnitsSold.week_date).all()
-    
-    sales_by_asin = {}
-    for sale in all_sales:
-        if sale.asin not in sales_by_asin:
-            sales_by_asin[sale.asin] = []
-        sales_by_asin[sale.asin].append({'week_end': sale.week_date, 'units': sale.units})
+    sales_by_asin = _SalesByAsin()
+    first_sales = sales_by_asin.first_sales()
     
     # Inventory totals
-    fba_totals = dict(
-        db.session.query(
-            FBAInventory.asin,
-            func.coalesce(func.sum(FBAInventory.available), 0) + 
-            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0) +
-            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0)
-        ).group_by(FBAInventory.asin).all()
-    )
-    
-    fba_available = dict(
-        db.session.query(
-            FBAInventory.asin,
-            func.coalesce(func.sum(FBAInventory.available), 0)
-        ).group_by(FBAInventory.asin).all()
-    )
+    fba_rows = db.session.query(
+        FBAInventory.asin,
+        func.coalesce(func.sum(FBAInventory.available), 0).label('avail'),
+        func.coalesce(func.sum(FBAInventory.inbound_quantity), 0).label('inb'),
+        func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0).label('res')
+    ).group_by(FBAInventory.asin).all()
+    fba_totals = {row.asin: row.avail + row.inb + row.res for row in fba_rows}
+    fba_available = {row.asin: row.avail for row in fba_rows}
     
     awd_totals = dict(
         db.session.query(
@@ -1344,14 +2071,10 @@ def get_labels_needed():
         ).group_by(AWDInventory.asin).all()
     )
     
-    def calculate_single(asin):
+    failures = Counter()
+    
+    def calculate_single(asin, label, product):
         try:
-            label = labels.get(asin)
-            product = products.get(asin)
-            
-            if not label or not product:
-                return None
-            
             first_sale = first_sales.get(asin)
             if not first_sale:
                 return {
@@ -1403,17 +2126,21 @@ def get_labels_needed():
                 'labels_needed': labels_needed,
                 'status': 'Need labels' if labels_needed > 0 else 'Have enough'
             }
-        except:
+        except _FORECAST_DATA_ERRORS as e:
+            # Data problems drop the ASIN but are counted; anything else propagates
+            failures[type(e).__name__] += 1
+            if failures[type(e).__name__] == 1:
+                current_app.logger.warning("label forecast failed for %s", asin, exc_info=True)
             return None
     
-    # Parallel calculation
-    results = []
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {executor.submit(calculate_single, asin): asin for asin in labels.keys()}
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                results.append(result)
+    # The forecasts are pure-Python math the GIL serializes anyway, so one
+    # in-order pass beats a thread pool's per-ASIN futures
+    results = [
+        result for result in (
+            calculate_single(asin, label, products[asin])
+            for asin, label in labels.items() if asin in products
+        ) if result
+    ]
     
     # Sort
     sort_key = {
@@ -1424,7 +2151,7 @@ def get_labels_needed():
     }.get(sort_by, 'labels_needed')
     
     reverse = (order == 'desc')
-    results.sort(key=lambda x: (x.get(sort_key) or 0) if sort_key != 'product_name' else (x.get(sort_key) or ''), reverse=reverse)
+    results = _sort_rows(results, sort_key, reverse, text=(sort_key == 'product_name'))
     
     total_time = time.time() - start_time
     
@@ -1441,7 +2168,8 @@ def get_labels_needed():
             'products_with_enough': len(results) - products_needing_labels
         },
         'performance': {
-            'total_seconds': round(total_time, 2)
+            'total_seconds': round(total_time, 2),
+            'failures': dict(failures)
         }
     })
 
@@ -1459,58 +2187,27 @@ def get_labels_schedule():
     Response format:
     LABEL STATUS | BRAND | PRODUCT | SIZE | ADD | QTY | DOI | NEEDED BY
     """
-    from app.algorithms.algorithms_tps import (
-        calculate_forecast_18m_plus as tps_18m,
-        DEFAULT_SETTINGS
-    )
-    from datetime import date, timedelta
-    from collections import defaultdict
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    import time
-    
     start_time = time.time()
     today = date.today()
     
     # Get all label inventory
-    labels_list = LabelInventory.query.all()
-    labels = {l.asin: l for l in labels_list}
+    labels = {l.asin: l for l in db.session.execute(select(*_LABEL_COLUMNS))}
     
     # Get all products that have labels
-    products = {p.asin: p for p in Product.query.filter(Product.asin.in_(labels.keys())).all()}
+    products = forecast_service.get_products(list(labels))
     
     # Bulk load data
-    first_sales = dict(
-        db.session.query(
-            UnitsSold.asin,
-            func.min(UnitsSold.week_date)
-        ).filter(UnitsSold.units > 0).group_by(UnitsSold.asin).all()
-    )
-    
-    all_sales = db.session.query(
-        UnitsSold.asin, UnitsSold.week_date, UnitsSold.units
-    ).order_by(UnitsSold.asin, UnitsSold.week_date).all()
-    
-    sales_by_asin = {}
-    for sale in all_sales:
-        if sale.asin not in sales_by_asin:
-            sales_by_asin[sale.asin] = []
-        sales_by_asin[sale.asin].append({'week_end': sale.week_date, 'units': sale.units})
-    
-    fba_totals = dict(
-        db.session.query(
-            FBAInventory.asin,
-            func.coalesce(func.sum(FBAInventory.available), 0) + 
-            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0) +
-            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0)
-        ).group_by(FBAInventory.asin).all()
-    )
-    
-    fba_available = dict(
-        db.session.query(
-            FBAInventory.asin,
-            func.coalesce(func.sum(FBAInventory.available), 0)
-        ).group_by(FBAInventory.asin).all()
-    )
+    sales_by_asin = _SalesByAsin()
+    first_sales = sales_by_asin.first_sales()
+    
+    fba_rows = db.session.query(
+        FBAInventory.asin,
+        func.coalesce(func.sum(FBAInventory.available), 0).label('avail'),
+        func.coalesce(func.sum(FBAInventory.inbound_quantity), 0).label('inb'),
+        func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0).label('res')
+    ).group_by(FBAInventory.asin).all()
+    fba_totals = {row.asin: row.avail + row.inb + row.res for row in fba_rows}
+    fba_available = {row.asin: row.avail for row in fba_rows}
     
     awd_totals = dict(
         db.session.query(
@@ -1522,15 +2219,11 @@ def get_labels_schedule():
         ).group_by(AWDInventory.asin).all()
     )
     
-    def calculate_single_with_doi(asin):
+    failures = Counter()
+    
+    def calculate_single_with_doi(asin, label, product):
         """Calculate forecast with DOI for timing."""
         try:
-            label = labels.get(asin)
-            product = products.get(asin)
-            
-            if not label or not product:
-                return None
-            
             first_sale = first_sales.get(asin)
             units_data = sales_by_asin.get(asin, [])
             
@@ -1573,17 +2266,21 @@ def get_labels_schedule():
                 'stockout_date': stockout_date.isoformat(),
                 'labels_needed_by': labels_needed_by.isoformat()
             }
-        except Exception as e:
+        except _FORECAST_DATA_ERRORS as e:
+            # Data problems drop the ASIN but are counted; anything else propagates
+            failures[type(e).__name__] += 1
+            if failures[type(e).__name__] == 1:
+                current_app.logger.warning("label forecast failed for %s", asin, exc_info=True)
             return None
     
-    # Parallel calculation
-    product_results = []
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {executor.submit(calculate_single_with_doi, asin): asin for asin in labels.keys()}
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                product_results.append(result)
+    # The forecasts are pure-Python math the GIL serializes anyway, so one
+    # in-order pass beats a thread pool's per-ASIN futures
+    product_results = [
+        result for result in (
+            calculate_single_with_doi(asin, label, products[asin])
+            for asin, label in labels.items() if asin in products
+        ) if result
+    ]
     
     # Group by label_id and aggregate
     label_groups = defaultdict(lambda: {
@@ -1663,6 +2360,7 @@ def get_labels_schedule():
             'urgent_count': len([r for r in results if r['doi'] < 30 and r['labels_needed'] > 0])
         },
         'performance': {
-            'total_seconds': round(total_time, 2)
+            'total_seconds': round(total_time, 2),
+            'failures': dict(failures)
         }
     })
@@ -5,11 +5,13 @@ This allows the /forecast/all endpoint to return 1000+ products instantly.
 Run refresh_all_forecasts() periodically (e.g., daily) to update cache.
 """
 from datetime import datetime, date, timedelta
+from itertools import groupby
+from operator import itemgetter
 from typing import Dict, List, Any
-from sqlalchemy import func
+from sqlalchemy import delete, func, insert, select
 
 from app import db
-from app.models import Product, UnitsSold, ForecastCache, Seasonality
+from app.models import Product, UnitsSold, ForecastCache
 from app.services.forecast_service import forecast_service
 from app.algorithms.algorithms_tps import (
     calculate_forecast_18m_plus as tps_18m,
@@ -23,6 +25,7 @@ class CacheService:
     """Service for managing forecast cache."""
     
     CACHE_DURATION_HOURS = 24  # Cache validity
+    WRITE_CHUNK_SIZE = 1000    # Rows per multi-row INSERT when saving the cache
     
     def get_all_cached_forecasts(self, brand_filter: str = None) -> List[Dict]:
         """
@@ -81,22 +84,21 @@ class CacheService:
         """
         Refresh ALL product forecasts - run this periodically.
         
-        Optimized with batch processing and bulk inserts.
+        Optimized with batch processing and bulk inserts: weekly sales are
+        loaded for `batch_size` products at a time (one IN query per batch),
+        so neither round-trips nor memory grow with the whole sales table.
         """
         import time
         start_time = time.perf_counter()
         
-        # Get all products
-        products = Product.query.all()
-        total_products = len(products)
+        # Get all products (only the ASIN is needed - no ORM instances)
+        asins = db.session.execute(select(Product.asin)).scalars().all()
+        total_products = len(asins)
         
         print(f"[CACHE] Refreshing forecasts for {total_products} products...")
         
         # Pre-fetch seasonality data once
-        seasonality_data = [
-            {'week_of_year': s.week_of_year, 'seasonality_index': s.seasonality_index}
-            for s in Seasonality.query.all()
-        ]
+        seasonality_data = forecast_service.get_seasonality_data()
         
         # Pre-fetch all first sale dates in one query
         first_sales = dict(
@@ -106,6 +108,9 @@ class CacheService:
             ).filter(UnitsSold.units > 0).group_by(UnitsSold.asin).all()
         )
         
+        # Pre-fetch inventory for every product (one GROUP BY per table)
+        inventories = forecast_service.get_inventory_levels_bulk(asins)
+        
         today = date.today()
         now = datetime.utcnow()
         expires_at = now + timedelta(hours=self.CACHE_DURATION_HOURS)
@@ -114,8 +119,18 @@ class CacheService:
         error_count = 0
         results = []
         
-        for i, product in enumerate(products):
-            asin = product.asin
+        for i, asin in enumerate(asins):
+            if i % batch_size == 0:
+                # Sales for the next batch of products in one ordered IN query
+                batch_sales = db.session.execute(
+                    select(UnitsSold.asin, UnitsSold.week_date, UnitsSold.units)
+                    .where(UnitsSold.asin.in_(asins[i:i + batch_size]))
+                    .order_by(UnitsSold.asin, UnitsSold.week_date)
+                ).all()
+                sales_by_asin = {
+                    key: [{'week_end': week_date, 'units': units} for _, week_date, units in rows]
+                    for key, rows in groupby(batch_sales, key=itemgetter(0))
+                }
             
             try:
                 # Get first sale date from pre-fetched dict
@@ -137,15 +152,14 @@ class CacheService:
                     algorithm = "0-6m"
                 
                 # Get sales data
-                sales = UnitsSold.query.filter_by(asin=asin).order_by(UnitsSold.week_date).all()
-                units_data = [{'week_end': s.week_date, 'units': s.units} for s in sales]
+                units_data = sales_by_asin.get(asin, [])
                 
                 if len(units_data) < 4:
                     # Not enough data - skip
                     continue
                 
                 # Get inventory
-                inventory = forecast_service.get_inventory_levels(asin)
+                inventory = inventories[asin]
                 
                 # Settings
                 settings = DEFAULT_SETTINGS.copy()
@@ -186,7 +200,7 @@ class CacheService:
                             'sales_velocity_adjustment': 0
                         }
                         algorithm = "simple"
-                    except:
+                    except Exception:
                         # Last resort: just set everything to 0
                         result = {
                             'units_to_make': 0,
@@ -226,11 +240,11 @@ class CacheService:
         if results:
             print(f"[CACHE] Saving {len(results)} forecasts to cache...")
             
-            # Clear old cache and insert new
-            ForecastCache.query.delete()
-            
-            # Bulk insert
-            db.session.bulk_insert_mappings(ForecastCache, results)
+            # Replace the cache in one transaction: Core DELETE, then multi-row
+            # INSERTs in fixed chunks (no ORM unit-of-work, bounded statement size)
+            db.session.execute(delete(ForecastCache))
+            for start in range(0, len(results), self.WRITE_CHUNK_SIZE):
+                db.session.execute(insert(ForecastCache), results[start:start + self.WRITE_CHUNK_SIZE])
             db.session.commit()
         
         elapsed = time.perf_counter() - start_time
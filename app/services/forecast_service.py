@@ -3,12 +3,22 @@ Forecast Service - Business logic layer for forecasting.
 
 Handles data retrieval from database and algorithm execution.
 """
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import groupby
+from operator import itemgetter
+
 import pandas as pd
 from datetime import datetime, date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
+from flask import current_app, has_app_context
+from sqlalchemy import select
 
 from app import db
-from app.models import Product, UnitsSold, FBAInventory, AWDInventory
+from app.models import Product, UnitsSold, FBAInventory, AWDInventory, Seasonality
 from app.algorithms.forecast_18m_plus import (
     Forecast18MonthPlus, 
     ForecastSettings, 
@@ -21,9 +31,220 @@ from app.algorithms.algorithms_tps import (
 )
 
 
+# Process-wide seasonality rows (52 weeks that only change on data sync)
+_SEASONALITY_CACHE = {'data': None, 'ts': 0.0}
+SEASONALITY_TTL_SECONDS = 300
+
+# Process-wide ASIN -> product row map (small table that changes on data sync).
+# Every gunicorn worker holds its own copy and invalidate_products() only clears
+# the calling worker's, so the others may serve edited rows for up to the TTL.
+_PRODUCT_CACHE = {'data': None, 'ts': 0.0}
+_PRODUCT_CACHE_LOCK = threading.Lock()
+PRODUCT_TTL_SECONDS = 60
+
+# Batches smaller than this run in-process; worker start-up would cost more than it saves
+PARALLEL_MIN_BATCH = 8
+
+# ASINs loaded and forecast per round in bulk runs - bounds memory for huge batches
+BULK_CHUNK_SIZE = 50
+
+
+def _forecast_response(
+    asin: str,
+    product_name: str,
+    product_age_months: float,
+    algorithm: str,
+    sales_history: pd.DataFrame,
+    inventory: InventoryLevels,
+    settings: Optional[ForecastSettings] = None
+) -> Dict[str, Any]:
+    """Run the forecast for one prepared product and shape the API response."""
+    if len(sales_history) < 4:
+        return {
+            'error': 'Insufficient sales history',
+            'asin': asin,
+            'sales_weeks': len(sales_history)
+        }
+    
+    # For now, use 18m+ for all - other algorithms to be implemented
+    result = Forecast18MonthPlus(settings).calculate(sales_history, inventory)
+    
+    return {
+        'asin': asin,
+        'product_name': product_name,
+        'product_age_months': round(product_age_months, 2),
+        'algorithm_used': algorithm,
+        'inventory': {
+            'total': inventory.total_inventory,
+            'fba_available': inventory.fba_available,
+            'fba_reserved': inventory.fba_reserved,
+            'fba_inbound': inventory.fba_inbound,
+            'awd_available': inventory.awd_available,
+        },
+        'forecast_result': {
+            'units_to_make': result.units_to_make,
+            'doi_total_days': round(result.doi_total_days, 2),
+            'doi_fba_available_days': round(result.doi_fba_available_days, 2),
+            'unit_needed_total': round(result.unit_needed_total, 2),
+            'sales_velocity_adjustment': round(result.sales_velocity_adjustment * 100, 2),
+        },
+        'settings_used': {
+            'amazon_doi_goal': result.settings_used.amazon_doi_goal,
+            'inbound_lead_time': result.settings_used.inbound_lead_time,
+            'manufacture_lead_time': result.settings_used.manufacture_lead_time,
+            'total_lead_time': result.settings_used.total_lead_time,
+            'total_doi_goal': result.settings_used.total_doi_goal,
+            'market_adjustment': result.settings_used.market_adjustment * 100,
+            'sales_velocity_adj_weight': result.settings_used.sales_velocity_adj_weight * 100,
+        }
+    }
+
+
+# This process's long-lived worker pool (see get_process_pool)
+_PROCESS_POOL = {'executor': None}
+_PROCESS_POOL_LOCK = threading.Lock()
+
+
+def process_pool_workers() -> int:
+    """The app's FORECAST_POOL_WORKERS (0 outside an app context)."""
+    return current_app.config.get('FORECAST_POOL_WORKERS', 0) if has_app_context() else 0
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    The shared process pool for CPU-bound forecast batches, created on first
+    use - or None where the app doesn't enable one (FORECAST_POOL_WORKERS < 2).
+    
+    One pool of FORECAST_POOL_WORKERS per gunicorn worker process, shared by
+    its request threads, and only the first large batch pays worker start-up.
+    Workers come from a forkserver (spawn where unavailable) rather than by
+    forking this multi-threaded process, whose other threads may hold the DB
+    pool, logging or import locks a forked child would inherit locked.
+    
+    Those start methods re-import the __main__ module in every worker, so only
+    application.py (gunicorn) enables the pool: an unguarded script - or
+    run.py, whose module level calls create_app() - would run its top level
+    again in each worker, or fail with BrokenProcessPool.
+    """
+    workers = process_pool_workers()
+    if workers < 2:
+        return None
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL['executor'] is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _PROCESS_POOL['executor'] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(method)
+            )
+        return _PROCESS_POOL['executor']
+
+
+def discard_process_pool(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker died) so the next batch starts a fresh one."""
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL['executor'] is executor:
+            _PROCESS_POOL['executor'] = None
+    executor.shutdown(wait=False)
+
+
+def _run_one(args: tuple) -> Dict[str, Any]:
+    """Process-pool entry point - plain data in, response dict out (no DB session)."""
+    return _forecast_response(*args)
+
+
 class ForecastService:
     """Service for running forecasts on products."""
     
+    @staticmethod
+    def get_seasonality_data(ttl: float = SEASONALITY_TTL_SECONDS) -> List[Dict]:
+        """
+        Seasonality rows for the 6-18m and 0-6m algorithms, cached per process.
+        
+        Reloaded with one tuple query at most every `ttl` seconds. The list is
+        shared between requests - treat it as read-only.
+        """
+        if _SEASONALITY_CACHE['data'] is None or time.monotonic() - _SEASONALITY_CACHE['ts'] >= ttl:
+            rows = db.session.query(
+                Seasonality.week_of_year,
+                Seasonality.seasonality_index,
+                Seasonality.sv_smooth_env_97
+            ).all()
+            _SEASONALITY_CACHE['data'] = [{
+                'week_of_year': week_of_year,
+                'seasonality_index': seasonality_index,
+                'sv_smooth_env_97': sv_smooth_env_97
+            } for week_of_year, seasonality_index, sv_smooth_env_97 in rows]
+            _SEASONALITY_CACHE['ts'] = time.monotonic()
+        return _SEASONALITY_CACHE['data']
+    
+    @staticmethod
+    def invalidate_seasonality() -> None:
+        """Drop the cached seasonality rows (call after writing Seasonality)."""
+        _SEASONALITY_CACHE['data'] = None
+    
+    @staticmethod
+    def get_products(asins: Optional[List[str]] = None, ttl: float = PRODUCT_TTL_SECONDS) -> Dict[str, Any]:
+        """
+        Map ASIN -> product row (asin, id, brand, product_name, size), cached per process.
+        
+        The whole table is reloaded at most every `ttl` seconds. ASINs missing
+        from the map (added since the last load) are fetched with one IN query,
+        so new products are visible immediately. Rows and the returned map are
+        read-only: the shared map is replaced under a lock, never changed in
+        place, so request threads can iterate it safely.
+        """
+        columns = (Product.asin, Product.id, Product.brand, Product.product_name, Product.size)
+        with _PRODUCT_CACHE_LOCK:
+            if _PRODUCT_CACHE['data'] is None or time.monotonic() - _PRODUCT_CACHE['ts'] >= ttl:
+                _PRODUCT_CACHE['data'] = {row.asin: row for row in db.session.execute(select(*columns))}
+                _PRODUCT_CACHE['ts'] = time.monotonic()
+            products = _PRODUCT_CACHE['data']
+        if asins is None:
+            return products
+        
+        missing = [asin for asin in asins if asin not in products]
+        if missing:
+            rows = db.session.execute(select(*columns).where(Product.asin.in_(missing)))
+            fetched = {row.asin: row for row in rows}
+            if fetched:
+                with _PRODUCT_CACHE_LOCK:
+                    # Skip the store if the map was reloaded or dropped meanwhile
+                    if _PRODUCT_CACHE['data'] is products:
+                        _PRODUCT_CACHE['data'] = {**products, **fetched}
+                products = {**products, **fetched}
+        return {asin: products[asin] for asin in asins if asin in products}
+    
+    @staticmethod
+    def refresh_products(asins: List[str]) -> None:
+        """
+        Re-read the rows for `asins` into the product map, bypassing the TTL.
+        
+        For callers that memoize responses built from the map: the rows they
+        read next match the database, not a load from up to a TTL ago.
+        """
+        if _PRODUCT_CACHE['data'] is None:
+            return  # the next get_products() loads the whole table anyway
+        columns = (Product.asin, Product.id, Product.brand, Product.product_name, Product.size)
+        rows = db.session.execute(select(*columns).where(Product.asin.in_(asins)))
+        fetched = {row.asin: row for row in rows}
+        with _PRODUCT_CACHE_LOCK:
+            products = _PRODUCT_CACHE['data']
+            if products is not None:
+                products = {asin: row for asin, row in products.items() if asin not in asins}
+                products.update(fetched)
+                _PRODUCT_CACHE['data'] = products
+    
+    @staticmethod
+    def get_product(asin: str):
+        """Cached product row for one ASIN, or None."""
+        return ForecastService.get_products([asin]).get(asin)
+    
+    @staticmethod
+    def invalidate_products() -> None:
+        """Drop this process's cached product map (call after writing Product)."""
+        with _PRODUCT_CACHE_LOCK:
+            _PRODUCT_CACHE['data'] = None
+    
     @staticmethod
     def get_product_age_months(asin: str) -> float:
         """Calculate product age in months from first sale date."""
@@ -44,51 +265,54 @@ class ForecastService:
     @staticmethod
     def get_sales_history(asin: str) -> pd.DataFrame:
         """Get sales history for a product."""
-        sales = UnitsSold.query.filter_by(asin=asin).order_by(UnitsSold.week_date).all()
+        sales = db.session.execute(
+            select(UnitsSold.week_date, UnitsSold.units)
+            .where(UnitsSold.asin == asin)
+            .order_by(UnitsSold.week_date)
+        ).all()
         
         if not sales:
             return pd.DataFrame(columns=['week_date', 'units'])
         
-        return pd.DataFrame([
-            {'week_date': s.week_date, 'units': s.units}
-            for s in sales
-        ])
+        return pd.DataFrame(sales, columns=['week_date', 'units'])
     
     @staticmethod
-    def get_inventory_levels(asin: str) -> InventoryLevels:
+    def inventory_sums(asin: str):
         """
-        Get current inventory levels for a product.
+        Single-row FBA and AWD SUM subqueries for one ASIN.
         
-        Aggregates across all SKUs for the same ASIN (important for products
-        with multiple SKU variations).
-        
-        Updated: 2026-01-21 - Added inbound and reserved quantities
+        Cross-join them (ON true) into a larger select to fetch inventory in
+        the same round-trip, then pass the row to inventory_levels().
         """
         from sqlalchemy import func
         
-        # Get FBA inventory - SUM across all SKUs for this ASIN
-        fba_agg = db.session.query(
-            func.coalesce(func.sum(FBAInventory.available), 0).label('available'),
-            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0).label('reserved'),
-            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0).label('inbound')
-        ).filter(FBAInventory.asin == asin).first()
-        
-        fba_available = int(fba_agg.available) if fba_agg else 0
-        fba_reserved = int(fba_agg.reserved) if fba_agg else 0
-        fba_inbound = int(fba_agg.inbound) if fba_agg else 0
-        
-        # Get AWD inventory - SUM across all SKUs for this ASIN
-        awd_agg = db.session.query(
-            func.coalesce(func.sum(AWDInventory.available_in_awd_units), 0).label('available'),
-            func.coalesce(func.sum(AWDInventory.reserved_in_awd_units), 0).label('reserved'),
-            func.coalesce(func.sum(AWDInventory.inbound_to_awd_units), 0).label('inbound'),
-            func.coalesce(func.sum(AWDInventory.outbound_to_fba_units), 0).label('outbound')
-        ).filter(AWDInventory.asin == asin).first()
-        
-        awd_available = int(awd_agg.available) if awd_agg else 0
-        awd_reserved = int(awd_agg.reserved) if awd_agg else 0
-        awd_inbound = int(awd_agg.inbound) if awd_agg else 0
-        awd_outbound = int(awd_agg.outbound) if awd_agg else 0
+        # FBA inventory - SUM across all SKUs for this ASIN
+        fba = select(
+            func.coalesce(func.sum(FBAInventory.available), 0).label('fba_available'),
+            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0).label('fba_reserved'),
+            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0).label('fba_inbound')
+        ).where(FBAInventory.asin == asin).subquery()
+        
+        # AWD inventory - SUM across all SKUs for this ASIN
+        awd = select(
+            func.coalesce(func.sum(AWDInventory.available_in_awd_units), 0).label('awd_available'),
+            func.coalesce(func.sum(AWDInventory.reserved_in_awd_units), 0).label('awd_reserved'),
+            func.coalesce(func.sum(AWDInventory.inbound_to_awd_units), 0).label('awd_inbound'),
+            func.coalesce(func.sum(AWDInventory.outbound_to_fba_units), 0).label('awd_outbound')
+        ).where(AWDInventory.asin == asin).subquery()
+        
+        return fba, awd
+    
+    @staticmethod
+    def inventory_levels(sums) -> InventoryLevels:
+        """Build InventoryLevels from a row carrying the inventory_sums() columns."""
+        fba_available = int(sums.fba_available)
+        fba_reserved = int(sums.fba_reserved)
+        fba_inbound = int(sums.fba_inbound)
+        awd_available = int(sums.awd_available)
+        awd_reserved = int(sums.awd_reserved)
+        awd_inbound = int(sums.awd_inbound)
+        awd_outbound = int(sums.awd_outbound)
         
         total = (fba_available + fba_reserved + fba_inbound + 
                  awd_available + awd_reserved + awd_inbound + awd_outbound)
@@ -104,6 +328,61 @@ class ForecastService:
             awd_outbound_to_fba=awd_outbound
         )
     
+    @staticmethod
+    def get_inventory_levels(asin: str) -> InventoryLevels:
+        """
+        Get current inventory levels for a product.
+        
+        Aggregates across all SKUs for the same ASIN (important for products
+        with multiple SKU variations).
+        
+        Updated: 2026-01-21 - Added inbound and reserved quantities
+        """
+        from sqlalchemy import true
+        
+        # Both aggregates are single rows - fetch them together in one round-trip
+        fba, awd = ForecastService.inventory_sums(asin)
+        sums = db.session.execute(
+            select(fba, awd).select_from(fba.join(awd, true()))
+        ).one()
+        return ForecastService.inventory_levels(sums)
+    
+    @staticmethod
+    def get_inventory_levels_bulk(asins: List[str]) -> Dict[str, InventoryLevels]:
+        """
+        get_inventory_levels() for many ASINs with one GROUP BY query per table.
+        
+        Every requested ASIN gets an entry; ASINs without inventory rows get zeros.
+        """
+        from sqlalchemy import func
+        
+        wanted = list(dict.fromkeys(asins))
+        
+        fba_by_asin = {row.asin: row for row in db.session.execute(select(
+            FBAInventory.asin,
+            func.coalesce(func.sum(FBAInventory.available), 0).label('available'),
+            func.coalesce(func.sum(FBAInventory.total_reserved_quantity), 0).label('reserved'),
+            func.coalesce(func.sum(FBAInventory.inbound_quantity), 0).label('inbound')
+        ).where(FBAInventory.asin.in_(wanted)).group_by(FBAInventory.asin))}
+        
+        awd_by_asin = {row.asin: row for row in db.session.execute(select(
+            AWDInventory.asin,
+            func.coalesce(func.sum(AWDInventory.available_in_awd_units), 0).label('available'),
+            func.coalesce(func.sum(AWDInventory.reserved_in_awd_units), 0).label('reserved'),
+            func.coalesce(func.sum(AWDInventory.inbound_to_awd_units), 0).label('inbound'),
+            func.coalesce(func.sum(AWDInventory.outbound_to_fba_units), 0).label('outbound')
+        ).where(AWDInventory.asin.in_(wanted)).group_by(AWDInventory.asin))}
+        
+        levels = {}
+        for asin in wanted:
+            fba = fba_by_asin.get(asin)
+            awd = awd_by_asin.get(asin)
+            fba_values = [int(fba.available), int(fba.reserved), int(fba.inbound)] if fba else [0, 0, 0]
+            awd_values = ([int(awd.available), int(awd.reserved), int(awd.inbound), int(awd.outbound)]
+                          if awd else [0, 0, 0, 0])
+            levels[asin] = InventoryLevels(sum(fba_values) + sum(awd_values), *fba_values, *awd_values)
+        return levels
+    
     @staticmethod
     def determine_algorithm(product_age_months: float) -> str:
         """Determine which algorithm to use based on product age."""
@@ -132,7 +411,7 @@ class ForecastService:
             Dictionary with forecast results and metadata
         """
         # Get product info
-        product = Product.query.filter_by(asin=asin).first()
+        product = self.get_product(asin)
         
         if not product:
             return {'error': f'Product not found: {asin}'}
@@ -147,49 +426,94 @@ class ForecastService:
         sales_history = self.get_sales_history(asin)
         inventory = self.get_inventory_levels(asin)
         
-        if len(sales_history) < 4:
-            return {
-                'error': 'Insufficient sales history',
-                'asin': asin,
-                'sales_weeks': len(sales_history)
-            }
-        
-        # Run appropriate algorithm
-        if algorithm == "18m+":
-            result = self._run_18m_plus_forecast(sales_history, inventory, settings)
-        else:
-            # For now, use 18m+ for all - other algorithms to be implemented
-            result = self._run_18m_plus_forecast(sales_history, inventory, settings)
+        return _forecast_response(
+            asin, product.product_name, product_age_months, algorithm,
+            sales_history, inventory, settings
+        )
+    
+    def run_forecast_bulk(
+        self,
+        asins: List[str],
+        settings: Optional[ForecastSettings] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run run_forecast() for many products with one query per table per chunk.
         
-        return {
-            'asin': asin,
-            'product_name': product.product_name,
-            'product_age_months': round(product_age_months, 2),
-            'algorithm_used': algorithm,
-            'inventory': {
-                'total': inventory.total_inventory,
-                'fba_available': inventory.fba_available,
-                'fba_reserved': inventory.fba_reserved,
-                'fba_inbound': inventory.fba_inbound,
-                'awd_available': inventory.awd_available,
-            },
-            'forecast_result': {
-                'units_to_make': result.units_to_make,
-                'doi_total_days': round(result.doi_total_days, 2),
-                'doi_fba_available_days': round(result.doi_fba_available_days, 2),
-                'unit_needed_total': round(result.unit_needed_total, 2),
-                'sales_velocity_adjustment': round(result.sales_velocity_adjustment * 100, 2),
-            },
-            'settings_used': {
-                'amazon_doi_goal': result.settings_used.amazon_doi_goal,
-                'inbound_lead_time': result.settings_used.inbound_lead_time,
-                'manufacture_lead_time': result.settings_used.manufacture_lead_time,
-                'total_lead_time': result.settings_used.total_lead_time,
-                'total_doi_goal': result.settings_used.total_doi_goal,
-                'market_adjustment': result.settings_used.market_adjustment * 100,
-                'sales_velocity_adj_weight': result.settings_used.sales_velocity_adj_weight * 100,
-            }
+        Products, sales and FBA/AWD totals are fetched with `asin IN (...)`
+        for each BULK_CHUNK_SIZE group and grouped in Python.
+        Larger batches spread the algorithm over a process pool. Results come
+        back in the order of `asins`, identical to calling run_forecast() each.
+        """
+        return list(self.iter_forecast_bulk(asins, settings))
+    
+    def iter_forecast_bulk(
+        self,
+        asins: List[str],
+        settings: Optional[ForecastSettings] = None,
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield run_forecast_bulk() results one `chunk_size` group of ASINs at a time.
+        
+        Only one chunk's inputs and results are held in memory; large batches
+        run on the shared get_process_pool() where the app enables one.
+        """
+        executor = get_process_pool() if len(set(asins)) >= PARALLEL_MIN_BATCH else None
+        workers = min(len(set(asins)), process_pool_workers())
+        for start in range(0, len(asins), chunk_size):
+            chunk = asins[start:start + chunk_size]
+            jobs = self._prepare_bulk_jobs(chunk)
+            if executor is not None:
+                # A few tasks per IPC round-trip, still enough pieces to balance the workers
+                per_task = max(1, len(jobs) // (workers * 4))
+                tasks = [(*args, settings) for args in jobs.values()]
+                try:
+                    computed = dict(zip(jobs, executor.map(_run_one, tasks, chunksize=per_task)))
+                except BrokenProcessPool:
+                    discard_process_pool(executor)
+                    raise
+            else:
+                computed = {asin: _forecast_response(*args, settings) for asin, args in jobs.items()}
+            
+            for asin in chunk:
+                yield computed.get(asin) or {'error': f'Product not found: {asin}'}
+    
+    def _prepare_bulk_jobs(self, asins: List[str]) -> Dict[str, tuple]:
+        """Load inputs for `asins` with one IN query per table; map ASIN -> _forecast_response() args minus settings."""
+        wanted = list(dict.fromkeys(asins))
+        
+        names = {asin: row.product_name for asin, row in self.get_products(wanted).items()}
+        
+        sales_rows = db.session.query(UnitsSold.asin, UnitsSold.week_date, UnitsSold.units).filter(
+            UnitsSold.asin.in_(wanted)
+        ).order_by(UnitsSold.asin, UnitsSold.week_date).all()
+        sales_by_asin = {
+            asin: [(week_date, units) for _, week_date, units in rows]
+            for asin, rows in groupby(sales_rows, key=itemgetter(0))
         }
+        
+        inventories = self.get_inventory_levels_bulk(wanted)
+        
+        today = datetime.today().date()
+        jobs = {}
+        for asin in wanted:
+            if asin not in names:
+                continue
+            
+            sales = sales_by_asin.get(asin, [])
+            first_sale = next((week_date for week_date, units in sales if units > 0), None)
+            product_age_months = (today - first_sale).days / 30.44 if first_sale else 0.0
+            
+            if sales:
+                sales_history = pd.DataFrame(sales, columns=['week_date', 'units'])
+            else:
+                sales_history = pd.DataFrame(columns=['week_date', 'units'])
+            
+            jobs[asin] = (asin, names[asin], product_age_months,
+                          self.determine_algorithm(product_age_months),
+                          sales_history, inventories[asin])
+        
+        return jobs
     
     def _run_18m_plus_forecast(
         self,
@@ -216,7 +540,7 @@ class ForecastService:
         Set 'auto_velocity': False to use the provided value instead of dynamic calculation.
         """
         # Get product info
-        product = Product.query.filter_by(asin=asin).first()
+        product = self.get_product(asin)
         if not product:
             return {'error': f'Product not found: {asin}'}
         
@@ -224,8 +548,12 @@ class ForecastService:
         product_age_months = self.get_product_age_months(asin)
         
         # Get sales data as list of dicts (TPS format)
-        sales = UnitsSold.query.filter_by(asin=asin).order_by(UnitsSold.week_date).all()
-        units_data = [{'week_end': s.week_date, 'units': s.units} for s in sales]
+        sales = db.session.execute(
+            select(UnitsSold.week_date, UnitsSold.units)
+            .where(UnitsSold.asin == asin)
+            .order_by(UnitsSold.week_date)
+        ).all()
+        units_data = [{'week_end': week_date, 'units': units} for week_date, units in sales]
         
         if len(units_data) < 4:
             return {'error': 'Insufficient sales history', 'asin': asin}
@@ -3,8 +3,13 @@ AWS Elastic Beanstalk entry point.
 EB looks for 'application' variable by default.
 """
 from app import create_app
+from config import get_pool_workers
 
 application = create_app('production')
 
+# Served by gunicorn, whose __main__ is safe to re-import, so large forecast
+# batches may use a process pool; scripts calling create_app() stay in-process
+application.config['FORECAST_POOL_WORKERS'] = get_pool_workers()
+
 if __name__ == '__main__':
     application.run()
@@ -25,11 +25,23 @@ def get_database_url() -> str:
     return url or get_sqlite_uri('forecast.db')
 
 
+def get_pool_workers() -> int:
+    """Forecast process-pool size per server worker: FORECAST_POOL_WORKERS, else a quarter of the CPUs."""
+    return int(os.getenv('FORECAST_POOL_WORKERS', (os.cpu_count() or 1) // 4))
+
+
 class Config:
     """Base configuration."""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Server-side cap (ms) on queries run while serving a request - PostgreSQL only
+    STATEMENT_TIMEOUT_MS = None
+    
+    # Process-pool workers for large forecast batches; below 2 they run in-process.
+    # Only the server entry point (application.py) sets it - see get_process_pool()
+    FORECAST_POOL_WORKERS = 0
+    
     # SQLAlchemy engine options for better performance
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,  # Verify connections before use
@@ -65,6 +77,10 @@ class ProductionConfig(Config):
         'max_overflow': 20,       # Extra connections when pool is full
         'pool_timeout': 30,       # Wait time for connection
     }
+    
+    # Cancel runaway request queries instead of holding a pooled connection;
+    # CLI commands and scripts (index builds, VACUUM, bulk loads) run without it
+    STATEMENT_TIMEOUT_MS = 30000
 
 
 class TestingConfig(Config):